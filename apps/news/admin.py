@@ -1,21 +1,59 @@
 from django.contrib import admin
-from .models import Source, Category, Article
+from core.paginator import EstimatedCountPaginator
+from .admin_filters import CategoryNameFilter, PublishedDrillDownFilter, SourceNameFilter
+from .search import search_filter
+from .models import Source, Category, Article, ArchivedArticle, BackfillCheckpoint, CrawlRun
 
 @admin.register(Source)
 class SourceAdmin(admin.ModelAdmin):
-    list_display = ('name', 'url', 'is_active')
+    list_display = ('name', 'url', 'is_active', 'crawl_interval', 'max_concurrency', 'last_crawled_at')
     list_filter = ('is_active',)
     search_fields = ('name',)
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
     list_display = ('name', 'slug')
+    search_fields = ('name',)
+    ordering = ('name',)
     prepopulated_fields = {'slug': ('name',)}
 
 @admin.register(Article)
 class ArticleAdmin(admin.ModelAdmin):
     list_display = ('title', 'source', 'published_at')
-    list_filter = ('source', 'categories')
-    search_fields = ('title', 'content')
-    date_hierarchy = 'published_at'
-    filter_horizontal = ('categories',)
\ No newline at end of file
+    # Источник и категория - полем ввода: полный список вариантов растет вместе с таблицами
+    list_filter = (PublishedDrillDownFilter, SourceNameFilter, CategoryNameFilter)
+    list_select_related = ('source',)
+    search_fields = ('title',)
+    autocomplete_fields = ('source', 'categories')
+    ordering = ('-published_at', '-id')
+    # Без точного COUNT(*) по всей таблице
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        # Поиск по полнотекстовому индексу вместо LIKE по title и content, все найденные
+        if not search_term.strip():
+            return queryset, False
+        return queryset.filter(search_filter(search_term)), False
+
+@admin.register(ArchivedArticle)
+class ArchivedArticleAdmin(admin.ModelAdmin):
+    list_display = ('title', 'source', 'published_at', 'archived_at')
+    list_filter = ('source',)
+    list_select_related = ('source',)
+    search_fields = ('=url',)
+    ordering = ('-published_at', '-id')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+@admin.register(BackfillCheckpoint)
+class BackfillCheckpointAdmin(admin.ModelAdmin):
+    list_display = ('date', 'articles', 'completed_at')
+    date_hierarchy = 'date'
+
+
+@admin.register(CrawlRun)
+class CrawlRunAdmin(admin.ModelAdmin):
+    list_display = ('source', 'status', 'started_at', 'duration', 'fetched', 'inserted')
+    list_filter = ('status', 'source')
+    list_select_related = ('source',)
\ No newline at end of file
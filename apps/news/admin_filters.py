@@ -0,0 +1,141 @@
+from calendar import monthrange
+from datetime import datetime, timedelta
+
+from django.contrib import admin
+from django.contrib.admin.views.main import PAGE_VAR
+from django.db.models import Max, Min
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from .models import Article
+
+MONTHS = ('Январь', 'Февраль', 'Март', 'Апрель', 'Май', 'Июнь', 'Июль',
+          'Август', 'Сентябрь', 'Октябрь', 'Ноябрь', 'Декабрь')
+
+
+def _parse(value):
+    """'2025', '2025-06' или '2025-06-01' -> (год, месяц, день), недостающее None"""
+    try:
+        parts = [int(p) for p in value.split('-')]
+        if not 1 <= len(parts) <= 3:
+            return None
+        year, month, day = parts + [None] * (3 - len(parts))
+        datetime(year, month or 1, day or 1)
+    except (TypeError, ValueError):
+        return None
+    return year, month, day
+
+
+def _period(year, month, day):
+    """Полуинтервал [начало, конец) периода в локальной зоне"""
+    if day:
+        start = datetime(year, month, day)
+        end = start + timedelta(days=1)
+    elif month:
+        start = datetime(year, month, 1)
+        end = datetime(year + month // 12, month % 12 + 1, 1)
+    else:
+        start, end = datetime(year, 1, 1), datetime(year + 1, 1, 1)
+    return timezone.make_aware(start), timezone.make_aware(end)
+
+
+class PublishedDrillDownFilter(admin.SimpleListFilter):
+    """
+    Навигация год -> месяц -> день по дате публикации.
+
+    В отличие от date_hierarchy не строит списки через DISTINCT по всей
+    таблице: границы берутся из MIN/MAX по индексу, а выбор периода -
+    диапазон published_at, который тоже идет по индексу.
+    """
+    title = _('Дата публикации')
+    parameter_name = 'published'
+
+    def lookups(self, request, model_admin):
+        selected = _parse(self.value() or '')
+        bounds = model_admin.get_queryset(request).order_by().aggregate(
+            first=Min('published_at'), last=Max('published_at'),
+        )
+        if not bounds['first']:
+            return ()
+        first = timezone.localtime(bounds['first'])
+        last = timezone.localtime(bounds['last'])
+
+        if selected is None:
+            return [(str(y), str(y)) for y in range(last.year, first.year - 1, -1)]
+
+        year, month, day = selected
+        choices = [(str(year), str(year))]
+        if month is None:
+            months = [
+                m for m in range(12, 0, -1)
+                if (first.year, first.month) <= (year, m) <= (last.year, last.month)
+            ]
+            return choices + [(f'{year}-{m:02d}', f'{MONTHS[m - 1]} {year}') for m in months]
+
+        choices.append((f'{year}-{month:02d}', f'{MONTHS[month - 1]} {year}'))
+        days = range(monthrange(year, month)[1], 0, -1)
+        return choices + [(f'{year}-{month:02d}-{d:02d}', f'{d:02d}.{month:02d}.{year}') for d in days]
+
+    def queryset(self, request, queryset):
+        selected = _parse(self.value() or '')
+        if selected is None:
+            return queryset
+        start, end = _period(*selected)
+        return queryset.filter(published_at__gte=start, published_at__lt=end)
+
+
+class InputFilter(admin.SimpleListFilter):
+    """
+    Поле ввода вместо списка всех вариантов.
+
+    Список всех источников и категорий в боковой панели растет вместе с
+    таблицами (категории создает сбор статей), а строится при каждом
+    открытии списка. Подклассы фильтруют по введенной строке в filter_value.
+    """
+    template = 'admin/news/input_filter.html'
+
+    def lookups(self, request, model_admin):
+        # Один вариант, чтобы фильтр выводился; варианты из БД не читаются
+        return (('', ''),)
+
+    def get_facet_counts(self, pk_attname, filtered_qs):
+        return {}
+
+    def choices(self, changelist):
+        # Остальные фильтры, поиск и сортировка - скрытыми полями формы
+        hidden = [
+            (name, value) for name, values in changelist.filter_params.items()
+            if name not in (self.parameter_name, PAGE_VAR) for value in values
+        ]
+        yield {
+            'selected': bool(self.value()),
+            'parameter_name': self.parameter_name,
+            'value': self.value() or '',
+            'hidden': hidden,
+            'query_string': changelist.get_query_string(remove=[self.parameter_name]),
+        }
+
+    def queryset(self, request, queryset):
+        value = (self.value() or '').strip()
+        return self.filter_value(queryset, value) if value else queryset
+
+    def filter_value(self, queryset, value):
+        raise NotImplementedError
+
+
+class SourceNameFilter(InputFilter):
+    title = _('Источник')
+    parameter_name = 'source_name'
+
+    def filter_value(self, queryset, value):
+        return queryset.filter(source__name__icontains=value)
+
+
+class CategoryNameFilter(InputFilter):
+    title = _('Категория')
+    parameter_name = 'category'
+
+    def filter_value(self, queryset, value):
+        # Подзапрос, а не JOIN: статья с несколькими подходящими категориями не дублируется
+        through = Article.categories.through.objects.filter(category__name__icontains=value)
+        return queryset.filter(pk__in=through.values('article_id'))
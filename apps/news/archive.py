@@ -0,0 +1,147 @@
+import gzip
+import json
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Case, Min, Value, When
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Article, ArchivedArticle
+
+TARGETS = ('table', 'jsonl')
+
+
+def retention_cutoff(days: int = None) -> datetime:
+    """Статьи, опубликованные раньше этого момента, уходят в архив"""
+    days = settings.NEWS_RETENTION_DAYS if days is None else days
+    return timezone.now() - timedelta(days=days)
+
+
+def oldest_ids(cutoff: datetime, limit: int) -> List[int]:
+    """Id самых старых статей до cutoff, по индексу (published_at, id)"""
+    return list(
+        Article.objects
+        .filter(published_at__lt=cutoff)
+        .order_by('published_at', 'id')
+        .values_list('id', flat=True)[:limit]
+    )
+
+
+def _load_rows(ids: List[int]) -> List[Dict]:
+    """Статьи вместе с текстом и названиями категорий, три запроса на пачку"""
+    rows = list(
+        Article.objects.filter(pk__in=ids).values(
+            'id', 'title', 'url', 'source_id', 'source__name', 'published_at', 'created_at',
+            'image_url', 'cluster_id', 'content', 'content_legacy',
+        )
+    )
+    categories = defaultdict(list)
+    through = Article.categories.through.objects.filter(article_id__in=ids)
+    for article_id, name in through.values_list('article_id', 'category__name'):
+        categories[article_id].append(name)
+    for row in rows:
+        legacy = row.pop('content_legacy')
+        row['content'] = row['content'] or legacy or None
+        row['categories'] = categories[row['id']]
+    return rows
+
+
+def _copy_to_table(rows: List[Dict]):
+    ArchivedArticle.objects.bulk_create(
+        [
+            ArchivedArticle(
+                id=row['id'], title=row['title'], url=row['url'], source_id=row['source_id'],
+                content=row['content'], categories=row['categories'], published_at=row['published_at'],
+                created_at=row['created_at'], image_url=row['image_url'], cluster_id=row['cluster_id'],
+            )
+            for row in rows
+        ],
+        # Повторный прогон после сбоя между копированием и удалением
+        ignore_conflicts=True,
+    )
+
+
+def export_path(day, directory: str = None) -> Path:
+    """Один файл на месяц публикации: articles-2025-01.jsonl.gz"""
+    return Path(directory or settings.NEWS_ARCHIVE_DIR) / f'articles-{day:%Y-%m}.jsonl.gz'
+
+
+def _export_to_jsonl(rows: List[Dict], directory: str = None):
+    by_file = defaultdict(list)
+    for row in rows:
+        by_file[export_path(timezone.localtime(row['published_at']), directory)].append(row)
+    for path, file_rows in by_file.items():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Дозапись отдельным gzip-членом; на диск до удаления из БД
+        with open(path, 'ab') as raw:
+            with gzip.GzipFile(fileobj=raw, mode='ab') as gz:
+                for row in file_rows:
+                    gz.write(json.dumps(row, ensure_ascii=False, cls=DjangoJSONEncoder).encode('utf-8') + b'\n')
+            raw.flush()
+            os.fsync(raw.fileno())
+
+
+def _delete(ids: List[int]):
+    """Удаление из основной таблицы; кластеры без первой статьи получают новую"""
+    # У Article нет receivers post_delete, поэтому delete() не загружает
+    # статьи, а удаляет пачкой вместе со связанными строками; из поискового
+    # индекса удаляет триггер БД
+    Article.objects.filter(pk__in=ids).delete()
+    heads = dict(
+        Article.objects
+        .filter(cluster_id__in=ids)
+        .values('cluster_id')
+        .annotate(head=Min('id'))
+        .values_list('cluster_id', 'head')
+    )
+    if heads:
+        Article.objects.filter(cluster_id__in=heads).update(
+            cluster_id=Case(*(When(cluster_id=old, then=Value(head)) for old, head in heads.items())),
+        )
+
+
+def archive_batch(cutoff: datetime, batch_size: int = 500, target: str = 'table', directory: str = None) -> int:
+    """
+    Перенос одной пачки самых старых статей, возвращает их число.
+
+    Каждая пачка - отдельная короткая транзакция, поэтому основная
+    таблица не блокируется надолго, а прерванный прогон продолжается
+    с того же места.
+    """
+    if target not in TARGETS:
+        raise ValueError(f'Неизвестное место архива: {target}')
+    ids = oldest_ids(cutoff, batch_size)
+    if not ids:
+        return 0
+    rows = _load_rows(ids)
+    if target == 'jsonl':
+        _export_to_jsonl(rows, directory)
+    with transaction.atomic():
+        if target == 'table':
+            _copy_to_table(rows)
+        _delete(ids)
+    return len(ids)
+
+
+def iter_exported(day, directory: str = None) -> Iterator[Dict]:
+    """Статьи за день из выгрузки jsonl.gz (повторы после сбоев отброшены)"""
+    path = export_path(day, directory)
+    if not path.exists():
+        return
+    seen = set()
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            row = json.loads(line)
+            published_at = parse_datetime(row['published_at'])
+            if row['id'] in seen or timezone.localtime(published_at).date() != day:
+                continue
+            seen.add(row['id'])
+            row['published_at'] = published_at
+            yield row
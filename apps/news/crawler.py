@@ -0,0 +1,301 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Dict, List, Optional
+from urllib.parse import urljoin
+
+from asgiref.sync import sync_to_async
+from django.utils import timezone
+
+from core.db_router import reset_state
+
+from .ingestion import (
+    ingest_articles, parse_published_at, save_article_details, stored_urls, urls_without_details,
+)
+from .models import CrawlRun, Source
+from .parsers import KaktusMediaParser, get_parser_class
+
+logger = logging.getLogger(__name__)
+
+INGEST_BATCH_SIZE = 100
+
+
+async def fetch_details(parser: KaktusMediaParser, urls) -> int:
+    """Догрузка текста для статей без него; уже сохраненные и исчерпавшие попытки не запрашиваются"""
+    missing = await sync_to_async(urls_without_details)(urls)
+    if not missing:
+        return 0
+    details = await parser.fetch_article_details(missing)
+    return await sync_to_async(save_article_details)(details, missing)
+
+
+async def ingest_stream(articles: AsyncIterator[Dict], date_str: str, base_url: str,
+                        batch_size: int = INGEST_BATCH_SIZE, source_name: Optional[str] = None) -> Dict:
+    """Запись потока статей пачками по batch_size: в памяти не больше одной пачки"""
+    stats = {'fetched': 0, 'created': [], 'updated': 0, 'urls': []}
+    batch: List[Dict] = []
+
+    async def flush():
+        result = await sync_to_async(ingest_articles)(batch, date_str, base_url, source_name)
+        stats['fetched'] += result['fetched']
+        stats['created'].extend(result['created'])
+        stats['updated'] += result['updated']
+        stats['urls'].extend(urljoin(base_url, article['url']) for article in batch)
+        batch.clear()
+
+    async for article in articles:
+        batch.append(article)
+        if len(batch) >= batch_size:
+            await flush()
+    if batch:
+        await flush()
+    return stats
+
+
+async def _until_cursor(articles: AsyncIterator[Dict], date_str: str, base_url: str,
+                        cursor: Optional[Dict], newest: Dict) -> AsyncIterator[Dict]:
+    """
+    Пропускает статьи до курсора прошлого запуска (список идет от новых к старым)
+    и запоминает в newest самую свежую из пройденных.
+    """
+    async for article in articles:
+        published_at = parse_published_at(date_str, article.get('time', ''))
+        url = urljoin(base_url, article['url'])
+        if cursor and (published_at < cursor['published_at'] or url == cursor['url']):
+            return
+        if not newest or published_at > newest['published_at']:
+            newest.update(published_at=published_at, url=url)
+        yield article
+
+
+async def crawl_date(parser: KaktusMediaParser, date: datetime, conditional: bool = False,
+                     with_details: bool = True, stop_at_known: bool = False,
+                     batch_size: int = INGEST_BATCH_SIZE, source_name: Optional[str] = None,
+                     cursor: Optional[Dict] = None) -> Dict:
+    """
+    Список статей за дату -> БД -> текст новых статей.
+
+    stop_at_known=True останавливает обход страниц на первой уже
+    сохраненной статье, cursor ({'published_at', 'url'}) - на статье
+    не новее курсора (для регулярного инкрементального парсинга).
+    В stats['newest'] - курсор для следующего запуска.
+    """
+    known = sync_to_async(stored_urls) if stop_at_known else None
+    date_str = date.strftime("%Y-%m-%d")
+    listing = {}
+    newest = {}
+    stats = await ingest_stream(
+        _until_cursor(
+            parser.iter_articles(date, conditional=conditional, known_urls=known, stats=listing),
+            date_str, parser.BASE_URL, cursor, newest,
+        ),
+        date_str,
+        parser.BASE_URL,
+        batch_size=batch_size,
+        source_name=source_name,
+    )
+    validators = listing.pop('validators', {})
+    stats.update(listing)
+    if validators and not stats['failed']:
+        # Только после записи статей: иначе сбой до нее спрятал бы
+        # страницу за 304 до ее следующего изменения
+        await parser.save_validators(validators)
+    stats['newest'] = newest or None
+    stats['details'] = 0
+    if with_details and stats['urls']:
+        stats['details'] = await fetch_details(parser, stats['urls'])
+    return stats
+
+
+def get_crawlable_sources() -> List[Source]:
+    """Активные источники, для которых есть зарегистрированный парсер"""
+    return [s for s in Source.objects.filter(is_active=True) if get_parser_class(s.url)]
+
+
+def get_cursor(source: Source) -> Optional[Dict]:
+    """Курсор последнего успешного запуска источника"""
+    run = (
+        CrawlRun.objects
+        .filter(source=source, status=CrawlRun.STATUS_SUCCESS, cursor_published_at__isnull=False)
+        .only('cursor_published_at', 'cursor_url')
+        .first()
+    )
+    if run is None:
+        return None
+    return {'published_at': run.cursor_published_at, 'url': run.cursor_url}
+
+
+def last_run_failed(source: Source) -> bool:
+    """Прошлый завершенный запуск источника неудачен: статьи за него получены не все"""
+    status = (
+        CrawlRun.objects
+        .filter(source=source)
+        .exclude(status=CrawlRun.STATUS_RUNNING)
+        .values_list('status', flat=True)
+        .first()
+    )
+    return status == CrawlRun.STATUS_FAILED
+
+
+async def crawl_source(source: Source, days: int = 2, with_details: bool = True) -> Dict:
+    """
+    Инкрементальный парсинг одного источника за последние days дней.
+
+    У каждого источника свой парсер: своя сессия и свой лимит
+    одновременных запросов (Source.max_concurrency). Обрабатываются
+    только статьи новее курсора прошлого запуска; метрики и новый
+    курсор сохраняются в CrawlRun.
+
+    Если список хотя бы за одну дату получен не весь, запуск неудачен и
+    курсор не сдвигается, а следующий запуск не останавливается на уже
+    сохраненных статьях и проходит список до курсора заново.
+    """
+    parser_class = get_parser_class(source.url)
+    started = time.monotonic()
+    resume = await sync_to_async(last_run_failed)(source)
+    run = await sync_to_async(CrawlRun.objects.create)(source=source)
+    cursor = await sync_to_async(get_cursor)(source)
+    totals = {'source': source.name, 'fetched': 0, 'created': 0, 'details': 0}
+
+    try:
+        async with parser_class(MAX_CONCURRENCY=source.max_concurrency) as parser:
+            today = timezone.localdate()
+            results = await asyncio.gather(*(
+                crawl_date(
+                    parser, datetime.combine(today - timedelta(days=offset), datetime.min.time()),
+                    conditional=not resume, with_details=with_details, stop_at_known=not resume,
+                    source_name=source.name, cursor=cursor,
+                )
+                for offset in range(days)
+            ))
+    except BaseException as e:
+        run.status = CrawlRun.STATUS_FAILED
+        run.error = repr(e)
+        run.duration = time.monotonic() - started
+        await sync_to_async(run.save)(update_fields=['status', 'error', 'duration'])
+        raise
+
+    newest = cursor
+    failed_dates = []
+    for offset, stats in enumerate(results):
+        totals['fetched'] += stats['fetched']
+        totals['created'] += len(stats['created'])
+        totals['details'] += stats['details']
+        if stats['failed']:
+            failed_dates.append((today - timedelta(days=offset)).isoformat())
+        if stats['newest'] and (newest is None or stats['newest']['published_at'] > newest['published_at']):
+            newest = stats['newest']
+
+    source.last_crawled_at = timezone.now()
+    await sync_to_async(source.save)(update_fields=['last_crawled_at'])
+    totals['duration'] = time.monotonic() - started
+
+    run.duration = totals['duration']
+    run.fetched = totals['fetched']
+    run.inserted = totals['created']
+    if failed_dates:
+        # Курсор остается прежним: статьи с недоступных страниц еще не получены
+        run.status = CrawlRun.STATUS_FAILED
+        run.error = f'Список получен не весь: {", ".join(failed_dates)}'
+        totals['error'] = run.error
+    else:
+        run.status = CrawlRun.STATUS_SUCCESS
+        if newest:
+            run.cursor_published_at = newest['published_at']
+            run.cursor_url = newest['url']
+    await sync_to_async(run.save)()
+    return totals
+
+
+def is_due(source: Source, now=None) -> bool:
+    if source.last_crawled_at is None:
+        return True
+    now = now or timezone.now()
+    return now - source.last_crawled_at >= timedelta(minutes=source.crawl_interval)
+
+
+async def crawl_due_sources(**kwargs) -> List[Dict]:
+    """Один проход: все источники, у которых подошел интервал, параллельно"""
+    sources = [s for s in await sync_to_async(get_crawlable_sources)() if is_due(s)]
+    results = await asyncio.gather(*(crawl_source(s, **kwargs) for s in sources), return_exceptions=True)
+    report = []
+    for source, result in zip(sources, results):
+        if isinstance(result, BaseException):
+            logger.exception('Ошибка парсинга источника %s', source.name, exc_info=result)
+            result = {'source': source.name, 'error': str(result)}
+        report.append(result)
+    return report
+
+
+class CrawlScheduler:
+    """
+    Постоянный планировщик: каждый активный источник крутится в своей
+    задаче со своим интервалом, поэтому медленный источник не задерживает
+    остальные, а новый источник добавляет пропускную способность.
+
+    Список источников перечитывается каждые refresh_interval секунд:
+    новые и включенные источники запускаются, удаленные и выключенные
+    останавливаются, интервал и параллелизм берутся из БД без перезапуска.
+    """
+
+    def __init__(self, timeout: Optional[float] = None, refresh_interval: float = 60, **crawl_kwargs):
+        self.timeout = timeout
+        self.refresh_interval = refresh_interval
+        self.crawl_kwargs = crawl_kwargs
+        self.sources: Dict[int, Source] = {}
+        self.tasks: Dict[int, asyncio.Task] = {}
+
+    async def sync_sources(self):
+        """Задачи планировщика - под текущий список источников в БД"""
+        sources = {source.pk: source for source in await sync_to_async(get_crawlable_sources)()}
+        for pk in list(self.tasks):
+            task = self.tasks[pk]
+            if pk not in sources or task.done() or sources[pk].url != self.sources[pk].url:
+                task.cancel()
+                del self.tasks[pk], self.sources[pk]
+        for pk, source in sources.items():
+            running = self.sources.get(pk)
+            if running is None:
+                self.sources[pk] = source
+                self.tasks[pk] = asyncio.ensure_future(self.run_source(source))
+            else:
+                # last_crawled_at у запущенного источника свой, актуальнее БД
+                running.name = source.name
+                running.crawl_interval = source.crawl_interval
+                running.max_concurrency = source.max_concurrency
+
+    async def run(self):
+        try:
+            while True:
+                await self.sync_sources()
+                if not self.tasks:
+                    logger.warning('Нет активных источников с зарегистрированным парсером')
+                await asyncio.sleep(self.refresh_interval)
+        finally:
+            tasks = list(self.tasks.values())
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self.tasks.clear()
+            self.sources.clear()
+
+    async def run_source(self, source: Source):
+        while True:
+            if not is_due(source):
+                # Не дольше refresh_interval: новый интервал из БД применяется сразу
+                next_at = source.last_crawled_at + timedelta(minutes=source.crawl_interval)
+                await asyncio.sleep(min((next_at - timezone.now()).total_seconds(), self.refresh_interval))
+                continue
+            reset_state()
+            try:
+                stats = await asyncio.wait_for(
+                    crawl_source(source, **self.crawl_kwargs),
+                    self.timeout or source.crawl_interval * 60,
+                )
+                logger.info('%(source)s: статей %(fetched)s, новых %(created)s за %(duration).1f с', stats)
+                if 'error' in stats:
+                    logger.warning('%(source)s: %(error)s', stats)
+            except Exception:
+                logger.exception('Ошибка парсинга источника %s', source.name)
+                source.last_crawled_at = timezone.now()
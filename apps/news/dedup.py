@@ -0,0 +1,136 @@
+import hashlib
+import random
+import re
+import struct
+from typing import Dict, Iterable, List, Set, Tuple
+
+from django.conf import settings
+from django.db.models import Case, Value, When
+
+from .models import Article, ArticleBucket
+
+NUM_HASHES = 16
+ROWS_PER_BAND = 2
+BANDS = NUM_HASHES // ROWS_PER_BAND
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20250601)  # фиксированное зерно: подписи сравнимы между процессами
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_HASHES)]
+_SIGNATURE = struct.Struct(f'>{NUM_HASHES}I')
+
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def features(text: str) -> Set[str]:
+    """Множество слов, обрезанных до 6 букв (грубая основа для русского)"""
+    return {w[:6] for w in _WORD_RE.findall(text.lower()) if len(w) > 1}
+
+
+def minhash(text: str) -> Tuple[int, ...]:
+    """MinHash-подпись: доля совпавших позиций двух подписей оценивает сходство Жаккара"""
+    hashes = [
+        int.from_bytes(hashlib.blake2b(f.encode(), digest_size=8).digest(), 'big')
+        for f in features(text)
+    ] or [0]
+    return tuple(min((a * h + b) % _PRIME for h in hashes) & 0xFFFFFFFF for a, b in _PERMUTATIONS)
+
+
+def similarity(a: Tuple[int, ...], b: Tuple[int, ...]) -> float:
+    return sum(x == y for x, y in zip(a, b)) / NUM_HASHES
+
+
+def bands(signature: Tuple[int, ...]) -> List[Tuple[int, int]]:
+    """(номер полосы, хеш полосы): похожие статьи совпадают хотя бы в одной полосе"""
+    result = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        digest = hashlib.blake2b(repr((band, rows)).encode(), digest_size=4).digest()
+        result.append((band, int.from_bytes(digest, 'big') & 0x7FFFFFFF))
+    return result
+
+
+def pack(signature: Tuple[int, ...]) -> bytes:
+    return _SIGNATURE.pack(*signature)
+
+
+def unpack(data) -> Tuple[int, ...]:
+    return _SIGNATURE.unpack(bytes(data))
+
+
+def fingerprint_text(title: str, content: str = '') -> str:
+    return f'{title} {content[:500]}' if content else title
+
+
+def assign_clusters(articles: Iterable[Tuple[int, str, str]]) -> Dict[int, int]:
+    """
+    MinHash-подпись и кластер для новых статей (id, title, content).
+
+    Кандидаты ищутся одним запросом по LSH-корзинам, а не сравнением со
+    всей историей; итоговая проверка - оценка сходства не ниже
+    NEWS_DEDUP_MIN_SIMILARITY. Возвращает {id статьи: id кластера}.
+    """
+    min_similarity = settings.NEWS_DEDUP_MIN_SIMILARITY
+    new = sorted((pk, minhash(fingerprint_text(title, content or ''))) for pk, title, content in articles)
+    if not new:
+        return {}
+
+    wanted = {key for _, signature in new for key in bands(signature)}
+    index: Dict[Tuple[int, int], List[Tuple[int, Tuple[int, ...], int]]] = {}
+    candidates = (
+        ArticleBucket.objects
+        .filter(value__in={value for _, value in wanted})
+        .exclude(article_id__in=[pk for pk, _ in new])
+        .values_list('band', 'value', 'article_id', 'article__minhash', 'article__cluster_id')
+    )
+    for band, value, article_id, signature, cluster_id in candidates:
+        if (band, value) in wanted and signature is not None:
+            index.setdefault((band, value), []).append((article_id, unpack(signature), cluster_id or article_id))
+
+    clusters = {}
+    for pk, signature in new:
+        matches = [
+            (other_id, other_cluster)
+            for key in bands(signature)
+            for other_id, other_signature, other_cluster in index.get(key, [])
+            if similarity(signature, other_signature) >= min_similarity
+        ]
+        # Присоединяемся к кластеру самой ранней похожей статьи
+        clusters[pk] = min(matches)[1] if matches else pk
+        # Статьи этой же пачки - кандидаты для следующих
+        for key in bands(signature):
+            index.setdefault(key, []).append((pk, signature, clusters[pk]))
+
+    signatures = dict(new)
+    Article.objects.bulk_update(
+        [Article(pk=pk, minhash=pack(signatures[pk]), cluster_id=cluster) for pk, cluster in clusters.items()],
+        ['minhash', 'cluster_id'],
+        batch_size=500,
+    )
+    ArticleBucket.objects.bulk_create(
+        [ArticleBucket(article_id=pk, band=band, value=value) for pk, signature in new for band, value in bands(signature)],
+        batch_size=1000,
+    )
+    return clusters
+
+
+def refresh_clusters(articles: Iterable[Tuple[int, str, str]]) -> Dict[int, int]:
+    """
+    Подпись и кластер заново для статей (id, title, content), у которых появился текст.
+
+    При записи из списка подпись считается только по заголовку; с текстом
+    статья может оказаться дубликатом другой. Если в чужой кластер ушла
+    первая статья кластера, ее соседи переводятся туда же одним UPDATE.
+    """
+    articles = list(articles)
+    ids = [pk for pk, _, _ in articles]
+    if not ids:
+        return {}
+    previous = dict(Article.objects.filter(pk__in=ids).values_list('id', 'cluster_id'))
+    ArticleBucket.objects.filter(article_id__in=ids).delete()
+    clusters = assign_clusters(articles)
+
+    moved = {pk: cluster for pk, cluster in clusters.items() if previous.get(pk) == pk and cluster != pk}
+    if moved:
+        Article.objects.filter(cluster_id__in=moved).exclude(pk__in=ids).update(
+            cluster_id=Case(*(When(cluster_id=old, then=Value(new)) for old, new in moved.items())),
+        )
+    return clusters
@@ -0,0 +1,176 @@
+import logging
+import threading
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+
+from core.redis import get_redis
+from .models import Article
+
+logger = logging.getLogger(__name__)
+
+
+def feed_key(user_id: int) -> str:
+    return f'feed:user:{user_id}'
+
+
+def feed_score(published_at: datetime) -> int:
+    """Score в ленте - секунды публикации; порядок статей одной секунды задает id"""
+    return int(published_at.timestamp())
+
+
+def feed_member(article_id: int) -> str:
+    """
+    Member sorted set: id с ведущими нулями.
+
+    При равном score Redis сортирует member как строки, а с нулями
+    строковый порядок совпадает с порядком id.
+    """
+    return f'{article_id:020d}'
+
+
+Cursor = Tuple[int, int]  # (score, id) последней статьи страницы
+
+
+class RedisFeedStore:
+    """Ленты пользователей в sorted set Redis: member - feed_member, score - feed_score"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def push(self, feeds: Dict[int, Dict[int, int]], max_length: int):
+        pipe = self.client.pipeline(transaction=False)
+        for user_id, items in feeds.items():
+            key = feed_key(user_id)
+            pipe.zadd(key, {feed_member(pk): score for pk, score in items.items()})
+            # Оставляем только max_length самых новых
+            pipe.zremrangebyrank(key, 0, -max_length - 1)
+        pipe.execute()
+
+    def replace(self, user_id: int, items: Dict[int, int]):
+        pipe = self.client.pipeline(transaction=True)
+        pipe.delete(feed_key(user_id))
+        if items:
+            pipe.zadd(feed_key(user_id), {feed_member(pk): score for pk, score in items.items()})
+        pipe.execute()
+
+    def page(self, user_id: int, before: Optional[Cursor], limit: int) -> List[Tuple[int, int]]:
+        """
+        До limit статей (id, score) строго после курсора.
+
+        Статьи той же секунды, что и курсор, берутся отдельным запросом
+        по этому score и отсекаются по id; оба запроса - в одном pipeline.
+        """
+        key = feed_key(user_id)
+        if before is None:
+            rows = self.client.zrevrangebyscore(key, '+inf', '-inf', start=0, num=limit, withscores=True)
+            return [(int(member), int(score)) for member, score in rows]
+
+        score, article_id = before
+        pipe = self.client.pipeline(transaction=False)
+        pipe.zrevrangebyscore(key, score, score, withscores=True)
+        pipe.zrevrangebyscore(key, f'({score}', '-inf', start=0, num=limit, withscores=True)
+        ties, older = pipe.execute()
+        rows = [(int(member), int(s)) for member, s in ties if int(member) < article_id]
+        rows += [(int(member), int(s)) for member, s in older]
+        return rows[:limit]
+
+
+class LocalFeedStore:
+    """Замена Redis в памяти процесса (разработка, тесты)"""
+
+    def __init__(self):
+        self.feeds: Dict[int, Dict[int, int]] = defaultdict(dict)
+        self.lock = threading.Lock()
+
+    def push(self, feeds: Dict[int, Dict[int, int]], max_length: int):
+        with self.lock:
+            for user_id, items in feeds.items():
+                feed = self.feeds[user_id]
+                feed.update(items)
+                if len(feed) > max_length:
+                    keep = sorted(feed.items(), key=lambda item: (item[1], item[0]), reverse=True)[:max_length]
+                    self.feeds[user_id] = dict(keep)
+
+    def replace(self, user_id: int, items: Dict[int, int]):
+        with self.lock:
+            self.feeds[user_id] = dict(items)
+
+    def page(self, user_id: int, before: Optional[Cursor], limit: int) -> List[Tuple[int, int]]:
+        with self.lock:
+            items = [
+                (article_id, score) for article_id, score in self.feeds.get(user_id, {}).items()
+                if before is None or (score, article_id) < before
+            ]
+        return sorted(items, key=lambda item: (item[1], item[0]), reverse=True)[:limit]
+
+    def clear(self):
+        with self.lock:
+            self.feeds.clear()
+
+
+_local_store = LocalFeedStore()
+
+
+def get_feed_store():
+    client = get_redis()
+    return RedisFeedStore(client) if client is not None else _local_store
+
+
+def fan_out(article_ids: Iterable[int]):
+    """
+    Рассылка новых статей в ленты подписчиков их источника и категорий.
+
+    Четыре запроса на пачку статей независимо от числа подписчиков и
+    один pipeline в Redis. Вызывается после коммита ingest_articles.
+    """
+    article_ids = list(article_ids)
+    if not article_ids:
+        return
+    User = get_user_model()
+    articles = list(Article.objects.filter(pk__in=article_ids).values_list('id', 'source_id', 'published_at'))
+    categories = defaultdict(list)
+    through = Article.categories.through.objects.filter(article_id__in=article_ids)
+    for article_id, category_id in through.values_list('article_id', 'category_id'):
+        categories[category_id].append(article_id)
+
+    by_source = defaultdict(list)
+    for article_id, source_id, _ in articles:
+        by_source[source_id].append(article_id)
+
+    recipients = defaultdict(set)
+    source_subs = User.subscribed_sources.through.objects.filter(source_id__in=by_source)
+    for source_id, user_id in source_subs.values_list('source_id', 'customuser_id'):
+        recipients[user_id].update(by_source[source_id])
+    category_subs = User.subscribed_categories.through.objects.filter(category_id__in=categories)
+    for category_id, user_id in category_subs.values_list('category_id', 'customuser_id'):
+        recipients[user_id].update(categories[category_id])
+    if not recipients:
+        return
+
+    scores = {article_id: feed_score(published_at) for article_id, _, published_at in articles}
+    feeds = {user_id: {pk: scores[pk] for pk in ids} for user_id, ids in recipients.items()}
+    try:
+        get_feed_store().push(feeds, settings.NEWS_FEED_MAX_LENGTH)
+    except Exception as e:
+        # Ленты можно пересобрать (rebuild_feed), сбор статей останавливать нельзя
+        logger.warning('Не удалось обновить ленты подписчиков: %s', e)
+
+
+def rebuild_feed(user):
+    """Лента пользователя заново из БД: после смены подписок или потери данных в Redis"""
+    sources = list(user.subscribed_sources.values_list('id', flat=True))
+    categories = list(user.subscribed_categories.values_list('id', flat=True))
+    items = {}
+    if sources or categories:
+        matching = Article.objects.filter(
+            Q(source_id__in=sources)
+            | Q(pk__in=Article.categories.through.objects.filter(category_id__in=categories).values('article_id'))
+        )
+        rows = matching.order_by('-published_at', '-id').values_list('id', 'published_at')
+        items = {pk: feed_score(published_at) for pk, published_at in rows[:settings.NEWS_FEED_MAX_LENGTH]}
+    get_feed_store().replace(user.pk, items)
@@ -0,0 +1,55 @@
+import zlib
+
+from django import forms
+from django.db import models
+
+
+class CompressedTextField(models.BinaryField):
+    """
+    Текст, который хранится в БД сжатым zlib (BYTEA/BLOB).
+
+    В Python значение - обычная строка: сжимается при записи и
+    распаковывается при чтении колонки. Колонку стоит откладывать
+    (defer), тогда распаковка происходит только при обращении к полю.
+    """
+
+    def __init__(self, *args, level=6, **kwargs):
+        self.level = level
+        kwargs.setdefault('editable', True)
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.level != 6:
+            kwargs['level'] = self.level
+        if self.editable:
+            kwargs.pop('editable', None)
+        else:
+            kwargs['editable'] = False
+        return name, path, args, kwargs
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return None
+        return zlib.decompress(bytes(value)).decode('utf-8')
+
+    def to_python(self, value):
+        if isinstance(value, (bytes, memoryview)):
+            return zlib.decompress(bytes(value)).decode('utf-8')
+        return value
+
+    def get_prep_value(self, value):
+        if isinstance(value, str):
+            return zlib.compress(value.encode('utf-8'), self.level)
+        return value
+
+    def value_to_string(self, obj):
+        # Дамп (dumpdata) в читаемом виде, а не base64
+        return self.value_from_object(obj)
+
+    def formfield(self, **kwargs):
+        return models.Field.formfield(self, **{
+            'form_class': forms.CharField,
+            'widget': forms.Textarea,
+            **kwargs,
+        })
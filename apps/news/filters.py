@@ -1,18 +1,100 @@
+from datetime import datetime
+
+from django.db.models import CharField, F, Func, Q, QuerySet
+from rest_framework.exceptions import ValidationError
 from rest_framework.filters import BaseFilterBackend
 
+from .models import Source
+from .selectors import collapse_duplicates, day_range
+
+# Функция SQLite с Python str.upper (регистрируется в signals при подключении)
+SQLITE_UPPER = 'unicode_upper'
+
+
+def is_collapse_requested(request) -> bool:
+    return request.query_params.get('collapse') in ('1', 'true')
+
+
+class UnicodeUpper(Func):
+    """
+    UPPER() с кириллицей на всех СУБД.
+
+    Встроенные UPPER и LIKE в SQLite меняют регистр только у латиницы.
+    На PostgreSQL это выражение триграммного индекса UPPER(title).
+    """
+    function = 'UPPER'
+    output_field = CharField()
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return super().as_sql(compiler, connection, function=SQLITE_UPPER, **extra_context)
+
 
 class NewsFilterBackend(BaseFilterBackend):
+    """
+    Фильтры ленты: title, date (YYYY-MM-DD), source (id или название),
+    collapse=1 - по одной статье из каждого кластера почти-дубликатов.
+
+    Для QuerySet статей - запросы к БД по индексам (source, -published_at)
+    и триграммному индексу заголовка на PostgreSQL; для списка ответов
+    парсера ({'date', 'articles'}, режим live) - фильтрация в памяти.
+    Может ходить в БД, из async-кода вызывается через sync_to_async.
+    """
+
     def filter_queryset(self, request, queryset, view):
-        # Фильтр по заголовку
-        if title := request.query_params.get('title'):
-            queryset = [n for n in queryset if title.lower() in n['title'].lower()]
+        title = request.query_params.get('title')
+        date = request.query_params.get('date')
+        source = request.query_params.get('source')
+        collapse = is_collapse_requested(request)
+
+        if date:
+            try:
+                day = datetime.strptime(date, '%Y-%m-%d')
+            except ValueError:
+                raise ValidationError({'date': 'Дата должна быть в формате YYYY-MM-DD'})
 
-        # Фильтр по дате (формат YYYY-MM-DD)
-        if date := request.query_params.get('date'):
-            queryset = [n for n in queryset if n.get('date') == date]
+        if not isinstance(queryset, QuerySet):
+            return self.filter_list(queryset, title, day.strftime('%Y-%m-%d') if date else None, source, collapse)
+
+        # Фильтр по заголовку без учета регистра, как в filter_list
+        if title:
+            queryset = queryset.alias(title_upper=UnicodeUpper('title')).filter(title_upper__contains=title.upper())
+
+        # Фильтр по дате: диапазон суток, чтобы работал индекс по published_at
+        if date:
+            start, end = day_range(day)
+            queryset = queryset.filter(published_at__gte=start, published_at__lt=end)
 
         # Фильтр по источнику
-        if source := request.query_params.get('source'):
-            queryset = [n for n in queryset if n.get('source') == source]
+        if source:
+            if source.isdigit():
+                queryset = queryset.filter(source_id=int(source))
+            else:
+                queryset = queryset.filter(source__name=source)
+
+        # Только представители кластеров (первая статья сюжета)
+        if collapse:
+            queryset = queryset.filter(Q(cluster_id=F('id')) | Q(cluster_id__isnull=True))
+
+        return queryset
 
-        return queryset
\ No newline at end of file
+    @staticmethod
+    def filter_list(listings, title, date, source, collapse=False):
+        """Статьи из ответов парсера: дата - у списка, в статье только название источника"""
+        if source and source.isdigit():
+            source = Source.objects.filter(pk=int(source)).values_list('name', flat=True).first()
+            if source is None:
+                return []
+        title = title.upper() if title else None
+        articles = []
+        for listing in listings:
+            if date and listing['date'] != date:
+                continue
+            matching = [
+                n for n in listing['articles']
+                if (not title or title in n['title'].upper())
+                and (not source or n.get('source') == source)
+            ]
+            if collapse:
+                matching = collapse_duplicates(matching, listing.get('source', ''))
+            articles.extend(matching)
+        return articles
@@ -0,0 +1,191 @@
+from datetime import datetime, time, timedelta
+from functools import partial
+from typing import Dict, Iterable, List, Optional, Set
+from urllib.parse import urljoin
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.text import slugify
+
+from .models import Article, Category, Source
+from .dedup import assign_clusters, refresh_clusters
+from .feeds import fan_out
+from .parsers import source_domain
+from .selectors import get_source_ids
+from .stream import publish_articles
+from .search import index_articles
+
+# Кеш источников в памяти процесса: домен -> id
+_source_cache: Dict[str, int] = {}
+
+
+def clear_source_cache():
+    """Сброс кеша источников (например, в тестах)"""
+    _source_cache.clear()
+
+
+def get_source_id(name: str, url: str) -> int:
+    """
+    Id источника по домену url; в БД ходим только при промахе кеша.
+
+    Источник из админки находится по url, а не по имени из списка статей
+    ('Kaktus Media'), поэтому не дублируется. Новый создается с именем name.
+    """
+    domain = source_domain(url)
+    if domain not in _source_cache:
+        ids = get_source_ids(url)
+        _source_cache[domain] = ids[0] if ids else Source.objects.create(name=name, url=url).pk
+    return _source_cache[domain]
+
+
+def parse_published_at(date_str: str, time_str: str) -> datetime:
+    """Дата публикации из даты страницы и времени вида 'HH:MM'"""
+    day = datetime.strptime(date_str, "%Y-%m-%d").date()
+    try:
+        hours, minutes = (int(part) for part in time_str.split(':')[:2])
+        moment = time(hours, minutes)
+    except (AttributeError, ValueError):
+        moment = time(0, 0)
+    return timezone.make_aware(datetime.combine(day, moment))
+
+
+def _get_category_ids(names: Iterable[str]) -> Dict[str, int]:
+    """Id категорий по именам, недостающие создаются одним запросом"""
+    slugs = {name: slugify(name, allow_unicode=True)[:50] for name in set(names) if name}
+    if not slugs:
+        return {}
+    Category.objects.bulk_create(
+        [Category(name=name, slug=slug) for name, slug in slugs.items()],
+        ignore_conflicts=True,
+    )
+    by_slug = dict(Category.objects.filter(slug__in=slugs.values()).values_list('slug', 'id'))
+    return {name: by_slug[slug] for name, slug in slugs.items() if slug in by_slug}
+
+
+def ingest_articles(items: List[Dict], date_str: str, base_url: str,
+                    source_name: Optional[str] = None) -> Dict:
+    """
+    Сохранение статей парсера в БД пачкой.
+
+    Upsert по уникальному url, привязка категорий через bulk_create
+    промежуточной таблицы. Число запросов не зависит от размера пачки.
+    """
+    rows = {}
+    for item in items:
+        url = urljoin(base_url, item['url'])
+        rows[url] = item
+    if not rows:
+        return {'fetched': 0, 'created': [], 'updated': 0}
+
+    name = source_name or next(iter(rows.values())).get('source') or base_url
+    source_id = get_source_id(name, base_url)
+
+    with transaction.atomic():
+        existing = set(Article.objects.filter(url__in=rows.keys()).values_list('url', flat=True))
+        Article.objects.bulk_create(
+            [
+                Article(
+                    title=item['title'][:500],
+                    url=url,
+                    content=item.get('content') or None,
+                    image_url=item.get('image_url'),
+                    source_id=source_id,
+                    published_at=parse_published_at(date_str, item.get('time', '')),
+                )
+                for url, item in rows.items()
+            ],
+            update_conflicts=True,
+            unique_fields=['url'],
+            update_fields=['title', 'published_at', 'source'],
+        )
+
+        # Поисковый индекс и кластеры дубликатов - здесь же, bulk_create не шлет сигналов
+        # Текст - из content или еще не перенесенного content_legacy, иначе
+        # повторная запись списка стерла бы старый текст из индекса
+        stored = [
+            (pk, url, title, content or legacy)
+            for pk, url, title, content, legacy in Article.objects.filter(url__in=rows.keys())
+            .values_list('id', 'url', 'title', 'content', 'content_legacy')
+        ]
+        index_articles((pk, title, content) for pk, _, title, content in stored)
+        new_ids = [pk for pk, url, _, _ in stored if url not in existing]
+        assign_clusters((pk, title, content) for pk, url, title, content in stored if url not in existing)
+
+        category_names = {url: item['categories'] for url, item in rows.items() if item.get('categories')}
+        if category_names:
+            category_ids = _get_category_ids(n for names in category_names.values() for n in names)
+            article_ids = dict(Article.objects.filter(url__in=category_names.keys()).values_list('url', 'id'))
+            Through = Article.categories.through
+            Through.objects.bulk_create(
+                [
+                    Through(article_id=article_ids[url], category_id=category_ids[name])
+                    for url, names in category_names.items()
+                    for name in names
+                    if url in article_ids and name in category_ids
+                ],
+                ignore_conflicts=True,
+            )
+
+        # Ленты подписчиков и SSE-поток - только после коммита статей
+        transaction.on_commit(partial(fan_out, new_ids))
+        transaction.on_commit(partial(publish_articles, new_ids))
+
+    created = [url for url in rows if url not in existing]
+    return {'fetched': len(rows), 'created': created, 'updated': len(rows) - len(created)}
+
+
+def stored_urls(urls: Iterable[str]) -> Set[str]:
+    """Какие из url уже есть в БД"""
+    return set(Article.objects.filter(url__in=list(urls)).values_list('url', flat=True))
+
+
+def urls_without_details(urls: Iterable[str]) -> List[str]:
+    """
+    Url из списка, для которых в БД еще нет текста статьи.
+
+    Неудачные попытки повторяются не чаще NEWS_DETAILS_RETRY_INTERVAL
+    и не больше NEWS_DETAILS_MAX_ATTEMPTS раз: страница без текста не
+    запрашивается на каждом запуске парсинга.
+    """
+    retry_before = timezone.now() - timedelta(seconds=settings.NEWS_DETAILS_RETRY_INTERVAL)
+    return list(
+        Article.objects
+        .filter(url__in=list(urls), content__isnull=True, content_legacy='',
+                details_attempts__lt=settings.NEWS_DETAILS_MAX_ATTEMPTS)
+        .filter(Q(details_checked_at__isnull=True) | Q(details_checked_at__lte=retry_before))
+        .values_list('url', flat=True)
+    )
+
+
+def save_article_details(details: Dict[str, Dict], attempted: Iterable[str] = ()) -> int:
+    """
+    Запись текста и изображения статей одним bulk_update.
+
+    attempted - все запрошенные url, включая неудачные: им одним UPDATE
+    засчитывается попытка (см. urls_without_details).
+    """
+    attempted = list(attempted)
+    articles = list(Article.objects.filter(url__in=details.keys()).only('id', 'url', 'title')) if details else []
+    for article in articles:
+        detail = details[article.url]
+        article.content = detail.get('content') or None
+        image_url = detail.get('image_url')
+        article.image_url = image_url if image_url and len(image_url) <= 200 else None
+    with transaction.atomic():
+        if attempted:
+            Article.objects.filter(url__in=attempted).update(
+                details_attempts=F('details_attempts') + 1, details_checked_at=timezone.now(),
+            )
+        if articles:
+            Article.objects.bulk_update(articles, ['content', 'image_url'], batch_size=500)
+            index_articles((article.pk, article.title, article.content) for article in articles)
+            # Подпись при записи из списка - только по заголовку, с текстом дубликат виднее
+            refresh_clusters((article.pk, article.title, article.content) for article in articles if article.content)
+    return len(articles)
+
+
+def ingest_news(news_data: Dict) -> Dict:
+    """Сохранение результата KaktusMediaParser.fetch_news"""
+    return ingest_articles(news_data.get('articles', []), news_data['date'], news_data.get('source', ''))
@@ -0,0 +1,48 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.news.archive import TARGETS, archive_batch, retention_cutoff
+from apps.news.models import Article
+
+
+class Command(BaseCommand):
+    help = 'Перенос статей старше срока хранения в архив (таблица или jsonl.gz) пачками'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.NEWS_RETENTION_DAYS,
+            help='Срок хранения в основной таблице, дней',
+        )
+        parser.add_argument('--target', choices=TARGETS, default=settings.NEWS_ARCHIVE_TARGET)
+        parser.add_argument('--dir', default=settings.NEWS_ARCHIVE_DIR, help='Каталог выгрузки для --target jsonl')
+        parser.add_argument('--batch-size', type=int, default=500, help='Статей в одной транзакции')
+        parser.add_argument('--pause', type=float, default=0, help='Пауза между пачками, секунды')
+        parser.add_argument('--dry-run', action='store_true', help='Только посчитать статьи к переносу')
+
+    def handle(self, *args, **options):
+        if options['days'] < 1:
+            raise CommandError('--days должна быть больше 0')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должна быть больше 0')
+
+        cutoff = retention_cutoff(options['days'])
+        if options['dry_run']:
+            count = Article.objects.filter(published_at__lt=cutoff).count()
+            self.stdout.write(f'К переносу: {count} статей, опубликованных до {cutoff:%Y-%m-%d %H:%M}')
+            return
+
+        # Пачки берутся заново от самых старых: после прерывания команда
+        # просто запускается еще раз
+        total = 0
+        while True:
+            moved = archive_batch(cutoff, options['batch_size'], options['target'], options['dir'])
+            if not moved:
+                break
+            total += moved
+            self.stdout.write(f'Перенесено {total}')
+            if options['pause']:
+                time.sleep(options['pause'])
+
+        self.stdout.write(self.style.SUCCESS(f'Готово: в архив ({options["target"]}) перенесено {total} статей'))
@@ -0,0 +1,62 @@
+import multiprocessing
+import resource
+import time
+import tracemalloc
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.news.parsers import PARSE_ENGINES
+
+TESTDATA_DIR = Path(__file__).resolve().parents[2] / 'testdata'
+
+
+def run_engine(engine: str, pages: list, iterations: int) -> dict:
+    """Прогон одного движка; выполняется в отдельном процессе, чтобы пик памяти был честным"""
+    extract = PARSE_ENGINES[engine]
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    tracemalloc.start()
+    for html in pages:
+        extract(html)
+    _, python_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        for html in pages:
+            extract(html)
+    elapsed = time.perf_counter() - started
+
+    return {
+        'engine': engine,
+        'pages_per_second': iterations * len(pages) / elapsed,
+        'python_peak_kb': python_peak / 1024,
+        'rss_growth_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before,
+    }
+
+
+class Command(BaseCommand):
+    help = 'Сравнение скорости и памяти движков разбора списка статей на сохраненных страницах kaktus.media'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20, help='Сколько раз разобрать каждую страницу')
+        parser.add_argument('--fixtures', default=str(TESTDATA_DIR), help='Каталог с HTML-страницами')
+        parser.add_argument('--engine', action='append', choices=sorted(PARSE_ENGINES), help='Движок (по умолчанию все)')
+
+    def handle(self, *args, **options):
+        files = sorted(Path(options['fixtures']).glob('*.html'))
+        if not files:
+            raise CommandError(f"Нет HTML-файлов в {options['fixtures']}")
+        pages = [f.read_text(encoding='utf-8') for f in files]
+        engines = options['engine'] or sorted(PARSE_ENGINES)
+
+        self.stdout.write(f'Страниц: {len(pages)}, итераций: {options["iterations"]}')
+        self.stdout.write(f'{"движок":<8} {"стр/с":>10} {"пик Python, КБ":>16} {"рост RSS, КБ":>14}')
+        with multiprocessing.Pool(1, maxtasksperchild=1) as pool:
+            for engine in engines:
+                stats = pool.apply(run_engine, (engine, pages, options['iterations']))
+                self.stdout.write(
+                    f'{stats["engine"]:<8} {stats["pages_per_second"]:>10.1f} '
+                    f'{stats["python_peak_kb"]:>16.0f} {stats["rss_growth_kb"]:>14}'
+                )
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.news.models import Article
+
+
+class Command(BaseCommand):
+    help = 'Перенос текста статей из content_legacy в сжатую колонку content пачками'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Статей в одной транзакции')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size должна быть больше 0')
+        field = Article._meta.get_field('content')
+
+        # Keyset по id: каждая пачка - короткая транзакция, прерванный
+        # прогон просто продолжается (перенесенные строки уже пустые)
+        last_id = moved = raw_bytes = compressed_bytes = 0
+        while True:
+            rows = list(
+                Article.objects
+                .filter(pk__gt=last_id)
+                .order_by('pk')
+                .values_list('pk', 'content_legacy')[:batch_size]
+            )
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            articles = [Article(pk=pk, content=text, content_legacy='') for pk, text in rows if text]
+            if not articles:
+                continue
+            with transaction.atomic():
+                Article.objects.bulk_update(articles, ['content', 'content_legacy'])
+
+            moved += len(articles)
+            raw_bytes += sum(len(a.content.encode('utf-8')) for a in articles)
+            compressed_bytes += sum(len(field.get_prep_value(a.content)) for a in articles)
+            self.stdout.write(f'id <= {last_id}: перенесено {moved}')
+
+        if not moved:
+            self.stdout.write(self.style.SUCCESS('Нечего переносить'))
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: статей {moved}, {raw_bytes / 1024:.0f} КБ -> {compressed_bytes / 1024:.0f} КБ. '
+            f'Место в файлах БД освободит VACUUM'
+        ))
@@ -0,0 +1,32 @@
+import asyncio
+
+from django.core.management.base import BaseCommand
+
+from apps.news.crawler import CrawlScheduler, crawl_due_sources
+
+
+class Command(BaseCommand):
+    help = 'Парсинг всех активных источников, каждый по своему интервалу'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Один проход по источникам, у которых подошел интервал')
+        parser.add_argument('--days', type=int, default=2, help='За сколько последних дней проверять списки')
+        parser.add_argument('--no-details', action='store_true', help='Не догружать текст статей')
+        parser.add_argument('--refresh', type=float, default=60,
+                            help='Как часто планировщик перечитывает список источников, секунды')
+
+    def handle(self, *args, **options):
+        crawl_kwargs = {'days': options['days'], 'with_details': not options['no_details']}
+        if not options['once']:
+            self.stdout.write('Планировщик запущен, Ctrl+C для остановки')
+            asyncio.run(CrawlScheduler(refresh_interval=options['refresh'], **crawl_kwargs).run())
+            return
+
+        for stats in asyncio.run(crawl_due_sources(**crawl_kwargs)):
+            if 'error' in stats:
+                self.stderr.write(f"{stats['source']}: ошибка: {stats['error']}")
+            else:
+                self.stdout.write(
+                    f"{stats['source']}: статей {stats['fetched']}, новых {stats['created']}, "
+                    f"текстов {stats['details']} за {stats['duration']:.1f} с"
+                )
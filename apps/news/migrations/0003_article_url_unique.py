@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 13:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0002_alter_category_options_remove_source_categories_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='article',
+            name='url',
+            field=models.URLField(max_length=500, unique=True, verbose_name='Ссылка на статью'),
+        ),
+    ]
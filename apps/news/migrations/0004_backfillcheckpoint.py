@@ -0,0 +1,27 @@
+# Generated by Django 5.2.1 on 2026-10-18 13:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0003_article_url_unique'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BackfillCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True, verbose_name='Дата')),
+                ('articles', models.PositiveIntegerField(default=0, verbose_name='Статей')),
+                ('completed_at', models.DateTimeField(auto_now=True, verbose_name='Завершено')),
+            ],
+            options={
+                'verbose_name': 'Чекпоинт загрузки',
+                'verbose_name_plural': 'Чекпоинты загрузки',
+                'ordering': ['-date'],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.1 on 2026-10-18 13:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0004_backfillcheckpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='source',
+            name='crawl_interval',
+            field=models.PositiveIntegerField(default=15, verbose_name='Интервал парсинга (минуты)'),
+        ),
+        migrations.AddField(
+            model_name='source',
+            name='last_crawled_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Последний парсинг'),
+        ),
+        migrations.AddField(
+            model_name='source',
+            name='max_concurrency',
+            field=models.PositiveIntegerField(default=4, verbose_name='Одновременных запросов'),
+        ),
+    ]
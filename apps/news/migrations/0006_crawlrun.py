@@ -0,0 +1,35 @@
+# Generated by Django 5.2.1 on 2026-10-18 13:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0005_source_crawl_settings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CrawlRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('running', 'Выполняется'), ('success', 'Успешно'), ('failed', 'Ошибка')], default='running', max_length=16, verbose_name='Статус')),
+                ('started_at', models.DateTimeField(auto_now_add=True, verbose_name='Начало')),
+                ('duration', models.FloatField(blank=True, null=True, verbose_name='Длительность, с')),
+                ('fetched', models.PositiveIntegerField(default=0, verbose_name='Получено статей')),
+                ('inserted', models.PositiveIntegerField(default=0, verbose_name='Добавлено статей')),
+                ('error', models.TextField(blank=True, verbose_name='Ошибка')),
+                ('cursor_published_at', models.DateTimeField(blank=True, null=True, verbose_name='Курсор: дата публикации')),
+                ('cursor_url', models.URLField(blank=True, max_length=500, verbose_name='Курсор: ссылка')),
+                ('source', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='crawl_runs', to='news.source', verbose_name='Источник')),
+            ],
+            options={
+                'verbose_name': 'Запуск парсинга',
+                'verbose_name_plural': 'Запуски парсинга',
+                'ordering': ['-started_at'],
+                'indexes': [models.Index(fields=['source', 'status', '-started_at'], name='news_crawlr_source__5b2185_idx')],
+            },
+        ),
+    ]
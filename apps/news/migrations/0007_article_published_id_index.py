@@ -0,0 +1,21 @@
+# Generated by Django 5.2.1 on 2026-10-18 13:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0006_crawlrun'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['-published_at', '-id'], name='news_article_pub_id_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='article',
+            name='news_articl_publish_62720b_idx',
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.1 on 2026-10-18 13:47
+
+from django.db import migrations, models
+
+
+def create_title_trigram_index(apps, schema_editor):
+    # title__icontains на PostgreSQL: UPPER(title) LIKE UPPER(%s), индекс под это выражение
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS news_article_title_trgm_idx '
+        'ON news_article USING gin (UPPER(title) gin_trgm_ops)'
+    )
+
+
+def drop_title_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS news_article_title_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0007_article_published_id_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='source',
+            name='name',
+            field=models.CharField(db_index=True, max_length=200, verbose_name='Название'),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['source', '-published_at', '-id'], name='news_article_src_pub_idx'),
+        ),
+        migrations.RunPython(create_title_trigram_index, drop_title_trigram_index),
+    ]
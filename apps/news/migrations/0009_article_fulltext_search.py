@@ -0,0 +1,46 @@
+# Generated by Django 5.2.1 on 2026-10-18 13:48
+
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS news_article_fts "
+            "USING fts5(title, content, tokenize='unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(
+            'INSERT INTO news_article_fts (rowid, title, content) '
+            'SELECT id, title, content FROM news_article'
+        )
+    elif vendor == 'postgresql':
+        schema_editor.execute('ALTER TABLE news_article ADD COLUMN IF NOT EXISTS search_vector tsvector')
+        schema_editor.execute(
+            "UPDATE news_article SET search_vector = "
+            "setweight(to_tsvector('russian', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('russian', coalesce(content, '')), 'B')"
+        )
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS news_article_search_idx ON news_article USING gin (search_vector)'
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS news_article_fts')
+    elif vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS news_article_search_idx')
+        schema_editor.execute('ALTER TABLE news_article DROP COLUMN IF EXISTS search_vector')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0008_article_source_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.1 on 2026-10-18 13:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0009_article_fulltext_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='cluster_id',
+            field=models.BigIntegerField(blank=True, db_index=True, editable=False, null=True, verbose_name='Кластер'),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='minhash',
+            field=models.BinaryField(blank=True, null=True, verbose_name='MinHash-подпись'),
+        ),
+        migrations.CreateModel(
+            name='ArticleBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('band', models.PositiveSmallIntegerField()),
+                ('value', models.PositiveIntegerField()),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='buckets', to='news.article')),
+            ],
+            options={
+                'verbose_name': 'LSH-корзина',
+                'verbose_name_plural': 'LSH-корзины',
+                'indexes': [models.Index(fields=['value', 'band'], name='news_articl_value_5f7724_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+import apps.news.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """
+    Текст статьи переезжает в сжатую колонку content. Старая колонка
+    остается как content_legacy до прогона compress_article_content.
+    """
+
+    dependencies = [
+        ('news', '0010_article_near_duplicates'),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='article',
+            old_name='content',
+            new_name='content_legacy',
+        ),
+        migrations.AlterField(
+            model_name='article',
+            name='content_legacy',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='content',
+            field=apps.news.fields.CompressedTextField(blank=True, null=True, verbose_name='Содержание'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.1 on 2026-10-18 13:55
+
+import apps.news.fields
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0011_article_compressed_content'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedArticle',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=500, verbose_name='Заголовок')),
+                ('content', apps.news.fields.CompressedTextField(blank=True, null=True, verbose_name='Содержание')),
+                ('url', models.URLField(max_length=500, unique=True, verbose_name='Ссылка на статью')),
+                ('categories', models.JSONField(blank=True, default=list, verbose_name='Категории')),
+                ('published_at', models.DateTimeField(verbose_name='Дата публикации')),
+                ('created_at', models.DateTimeField()),
+                ('image_url', models.URLField(blank=True, null=True, verbose_name='Изображение')),
+                ('cluster_id', models.BigIntegerField(blank=True, null=True, verbose_name='Кластер')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='Перенесена в архив')),
+                ('source', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='news.source', verbose_name='Источник')),
+            ],
+            options={
+                'verbose_name': 'Архивная статья',
+                'verbose_name_plural': 'Архивные статьи',
+                'ordering': ['-published_at'],
+                'indexes': [models.Index(fields=['-published_at', '-id'], name='news_archived_pub_id_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-18 14:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0012_archived_article'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='details_attempts',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Попыток загрузки текста'),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='details_checked_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Последняя попытка загрузки текста'),
+        ),
+    ]
@@ -0,0 +1,87 @@
+from django.db import migrations
+
+# Поисковый индекс обновляет сама БД: правки через QuerySet.update(),
+# удаления (в том числе каскадные) и сырой SQL не проходят мимо него.
+# Сжатый content триггеру недоступен - его индексирует Python
+# (search.index_articles), триггеры берут заголовок и несжатый content_legacy.
+SQLITE_TRIGGERS = (
+    """
+    CREATE TRIGGER news_article_fts_insert AFTER INSERT ON news_article BEGIN
+        INSERT INTO news_article_fts (rowid, title, content) VALUES (new.id, new.title, new.content_legacy);
+    END
+    """,
+    """
+    CREATE TRIGGER news_article_fts_title AFTER UPDATE OF title ON news_article BEGIN
+        UPDATE news_article_fts SET title = new.title WHERE rowid = new.id;
+    END
+    """,
+    """
+    CREATE TRIGGER news_article_fts_content AFTER UPDATE OF content_legacy ON news_article
+    WHEN new.content_legacy != '' BEGIN
+        UPDATE news_article_fts SET content = new.content_legacy WHERE rowid = new.id;
+    END
+    """,
+    """
+    CREATE TRIGGER news_article_fts_delete AFTER DELETE ON news_article BEGIN
+        DELETE FROM news_article_fts WHERE rowid = old.id;
+    END
+    """,
+)
+SQLITE_DROP = (
+    'DROP TRIGGER IF EXISTS news_article_fts_insert',
+    'DROP TRIGGER IF EXISTS news_article_fts_title',
+    'DROP TRIGGER IF EXISTS news_article_fts_content',
+    'DROP TRIGGER IF EXISTS news_article_fts_delete',
+)
+
+# Вектор пересчитывается при смене заголовка или content_legacy; часть B
+# (текст) без content_legacy берется из старого вектора - ее записал Python
+POSTGRES_TRIGGER = (
+    """
+    CREATE OR REPLACE FUNCTION news_article_search_vector() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector := setweight(to_tsvector('russian', coalesce(NEW.title, '')), 'A') ||
+            CASE
+                WHEN NEW.content_legacy <> '' THEN setweight(to_tsvector('russian', NEW.content_legacy), 'B')
+                WHEN TG_OP = 'UPDATE' THEN ts_filter(coalesce(OLD.search_vector, ''::tsvector), '{b}')
+                ELSE ''::tsvector
+            END;
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER news_article_search_vector_update
+    BEFORE INSERT OR UPDATE OF title, content_legacy ON news_article
+    FOR EACH ROW EXECUTE FUNCTION news_article_search_vector()
+    """,
+)
+POSTGRES_DROP = (
+    'DROP TRIGGER IF EXISTS news_article_search_vector_update ON news_article',
+    'DROP FUNCTION IF EXISTS news_article_search_vector()',
+)
+
+
+def create_triggers(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    statements = {'sqlite': SQLITE_TRIGGERS, 'postgresql': POSTGRES_TRIGGER}.get(vendor, ())
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def drop_triggers(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    statements = {'sqlite': SQLITE_DROP, 'postgresql': POSTGRES_DROP}.get(vendor, ())
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0013_article_details_attempts'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_triggers, drop_triggers),
+    ]
@@ -2,11 +2,16 @@ from django.db import models
 from django.utils.text import slugify
 from django.utils.translation import gettext_lazy as _
 
+from .fields import CompressedTextField
+
 class Source(models.Model):
     """Источник новостей (например, Kaktus Media)"""
-    name = models.CharField(max_length=200, verbose_name=_('Название'))
+    name = models.CharField(max_length=200, db_index=True, verbose_name=_('Название'))
     url = models.URLField(verbose_name=_('URL источника'))
     is_active = models.BooleanField(default=True, verbose_name=_('Активен'))
+    crawl_interval = models.PositiveIntegerField(default=15, verbose_name=_('Интервал парсинга (минуты)'))
+    max_concurrency = models.PositiveIntegerField(default=4, verbose_name=_('Одновременных запросов'))
+    last_crawled_at = models.DateTimeField(null=True, blank=True, verbose_name=_('Последний парсинг'))
 
     class Meta:
         verbose_name = _('Источник')
@@ -25,24 +30,139 @@ class Category(models.Model):
             self.slug = slugify(self.name)
         super().save(*args, **kwargs)
 
+class ArticleManager(models.Manager):
+    """Текст статьи не читается из БД, пока к нему не обратятся"""
+
+    deferred_fields = ('content', 'content_legacy')
+
+    def get_queryset(self):
+        return super().get_queryset().defer(*self.deferred_fields)
+
+
+class ArchivedArticleManager(ArticleManager):
+    deferred_fields = ('content',)
+
+
 class Article(models.Model):
     """Новостная статья"""
     title = models.CharField(max_length=500, verbose_name=_('Заголовок'))
-    content = models.TextField(verbose_name=_('Содержание'))
-    url = models.URLField(verbose_name=_('Ссылка на статью'))
+    content = CompressedTextField(null=True, blank=True, verbose_name=_('Содержание'))
+    # Несжатый текст статей до перехода на CompressedTextField, переносится командой compress_article_content
+    content_legacy = models.TextField(blank=True, default='', editable=False)
+    url = models.URLField(max_length=500, unique=True, verbose_name=_('Ссылка на статью'))
     source = models.ForeignKey(Source, on_delete=models.CASCADE, verbose_name=_('Источник'))
     categories = models.ManyToManyField(Category, verbose_name=_('Категории'))
     published_at = models.DateTimeField(verbose_name=_('Дата публикации'))
     created_at = models.DateTimeField(auto_now_add=True)
     image_url = models.URLField(blank=True, null=True, verbose_name=_('Изображение'))
+    minhash = models.BinaryField(null=True, blank=True, editable=False, verbose_name=_('MinHash-подпись'))
+    # id первой статьи кластера почти одинаковых новостей (у нее самой cluster_id == id)
+    cluster_id = models.BigIntegerField(null=True, blank=True, db_index=True, editable=False, verbose_name=_('Кластер'))
+    # Попытки догрузить текст: после NEWS_DETAILS_MAX_ATTEMPTS страница больше не запрашивается
+    details_attempts = models.PositiveSmallIntegerField(default=0, editable=False, verbose_name=_('Попыток загрузки текста'))
+    details_checked_at = models.DateTimeField(null=True, blank=True, editable=False, verbose_name=_('Последняя попытка загрузки текста'))
+
+    objects = ArticleManager()
 
     class Meta:
         verbose_name = _('Статья')
         verbose_name_plural = _('Статьи')
         ordering = ['-published_at']
         indexes = [
-            models.Index(fields=['-published_at']),
+            # Лента и keyset-пагинация по (published_at, id)
+            models.Index(fields=['-published_at', '-id'], name='news_article_pub_id_idx'),
+            # Фильтр ленты по источнику
+            models.Index(fields=['source', '-published_at', '-id'], name='news_article_src_pub_idx'),
+        ]
+
+    def __str__(self):
+        return self.title[:50] + '...' if len(self.title) > 50 else self.title
+
+class ArchivedArticle(models.Model):
+    """Статья, перенесенная из основной таблицы политикой хранения (manage.py archive_news)"""
+    id = models.BigIntegerField(primary_key=True)  # id, который был у Article
+    title = models.CharField(max_length=500, verbose_name=_('Заголовок'))
+    content = CompressedTextField(null=True, blank=True, verbose_name=_('Содержание'))
+    url = models.URLField(max_length=500, unique=True, verbose_name=_('Ссылка на статью'))
+    source = models.ForeignKey(Source, on_delete=models.CASCADE, verbose_name=_('Источник'))
+    categories = models.JSONField(default=list, blank=True, verbose_name=_('Категории'))
+    published_at = models.DateTimeField(verbose_name=_('Дата публикации'))
+    created_at = models.DateTimeField()
+    image_url = models.URLField(blank=True, null=True, verbose_name=_('Изображение'))
+    cluster_id = models.BigIntegerField(null=True, blank=True, verbose_name=_('Кластер'))
+    archived_at = models.DateTimeField(auto_now_add=True, verbose_name=_('Перенесена в архив'))
+
+    objects = ArchivedArticleManager()
+
+    class Meta:
+        verbose_name = _('Архивная статья')
+        verbose_name_plural = _('Архивные статьи')
+        ordering = ['-published_at']
+        indexes = [
+            models.Index(fields=['-published_at', '-id'], name='news_archived_pub_id_idx'),
+        ]
+
+    def __str__(self):
+        return self.title[:50] + '...' if len(self.title) > 50 else self.title
+
+
+class ArticleBucket(models.Model):
+    """LSH-корзина: хеш одной полосы MinHash-подписи статьи для поиска почти-дубликатов"""
+    article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='buckets')
+    band = models.PositiveSmallIntegerField()
+    value = models.PositiveIntegerField()
+
+    class Meta:
+        verbose_name = _('LSH-корзина')
+        verbose_name_plural = _('LSH-корзины')
+        indexes = [
+            models.Index(fields=['value', 'band']),
+        ]
+
+
+class BackfillCheckpoint(models.Model):
+    """Отметка о полностью загруженной дате для backfill_news"""
+    date = models.DateField(unique=True, verbose_name=_('Дата'))
+    articles = models.PositiveIntegerField(default=0, verbose_name=_('Статей'))
+    completed_at = models.DateTimeField(auto_now=True, verbose_name=_('Завершено'))
+
+    class Meta:
+        verbose_name = _('Чекпоинт загрузки')
+        verbose_name_plural = _('Чекпоинты загрузки')
+        ordering = ['-date']
+
+    def __str__(self):
+        return f'{self.date}: {self.articles}'
+
+
+class CrawlRun(models.Model):
+    """Запуск планового парсинга источника: метрики и курсор последней статьи"""
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCESS = 'success'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = (
+        (STATUS_RUNNING, _('Выполняется')),
+        (STATUS_SUCCESS, _('Успешно')),
+        (STATUS_FAILED, _('Ошибка')),
+    )
+
+    source = models.ForeignKey(Source, on_delete=models.CASCADE, related_name='crawl_runs', verbose_name=_('Источник'))
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_RUNNING, verbose_name=_('Статус'))
+    started_at = models.DateTimeField(auto_now_add=True, verbose_name=_('Начало'))
+    duration = models.FloatField(null=True, blank=True, verbose_name=_('Длительность, с'))
+    fetched = models.PositiveIntegerField(default=0, verbose_name=_('Получено статей'))
+    inserted = models.PositiveIntegerField(default=0, verbose_name=_('Добавлено статей'))
+    error = models.TextField(blank=True, verbose_name=_('Ошибка'))
+    cursor_published_at = models.DateTimeField(null=True, blank=True, verbose_name=_('Курсор: дата публикации'))
+    cursor_url = models.URLField(max_length=500, blank=True, verbose_name=_('Курсор: ссылка'))
+
+    class Meta:
+        verbose_name = _('Запуск парсинга')
+        verbose_name_plural = _('Запуски парсинга')
+        ordering = ['-started_at']
+        indexes = [
+            models.Index(fields=['source', 'status', '-started_at']),
         ]
 
     def __str__(self):
-        return self.title[:50] + '...' if len(self.title) > 50 else self.title
\ No newline at end of file
+        return f'{self.source} {self.started_at:%Y-%m-%d %H:%M} {self.status}'
@@ -0,0 +1,166 @@
+import asyncio
+import hashlib
+import threading
+import time
+import uuid
+import weakref
+from datetime import date as date_type, datetime
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from core.redis import acquire_lock, get_redis, release_lock
+
+HIT = 'HIT'
+MISS = 'MISS'
+STALE = 'STALE'
+
+# Загрузки в процессе по event loop: loop -> {ключ: задача}, чтобы
+# одновременные запросы одного процесса ждали одну загрузку
+_inflight = weakref.WeakKeyDictionary()
+# Ссылки на фоновые обновления, чтобы их не собрал сборщик мусора
+_background = set()
+# Блокировки загрузки без Redis: ключ -> (токен, истекает в), только в пределах процесса
+_local_locks: Dict[str, Tuple[str, float]] = {}
+_local_locks_guard = threading.Lock()
+
+
+def news_cache_key(source: str, day: date_type) -> str:
+    source_hash = hashlib.sha1(source.encode()).hexdigest()[:12]
+    return f'news:data:{settings.NEWS_READ_MODE}:{source_hash}:{day:%Y-%m-%d}'
+
+
+def get_ttls(day: date_type) -> Tuple[int, int]:
+    """(сколько данные свежие, сколько еще можно отдавать устаревшие), секунды"""
+    if day < timezone.localdate():
+        # Прошедшие дни не меняются
+        return settings.NEWS_CACHE_PAST_TTL, settings.NEWS_CACHE_STALE_TTL
+    return settings.NEWS_CACHE_FRESH_TTL, settings.NEWS_CACHE_STALE_TTL
+
+
+async def _store(key: str, day: date_type, data: Dict):
+    # Неудачную загрузку (нет 'source') не кешируем
+    if 'source' not in data:
+        return
+    fresh, stale = get_ttls(day)
+    await cache.aset(key, {'data': data, 'fresh_until': time.time() + fresh}, timeout=fresh + stale)
+
+
+def _acquire_sync(lock_key: str) -> Optional[str]:
+    """Блокировка загрузки: в Redis (SET NX PX) - общая для всех процессов, без него - на процесс"""
+    timeout = settings.NEWS_CACHE_LOCK_TIMEOUT
+    client = get_redis()
+    if client is not None:
+        return acquire_lock(client, lock_key, timeout)
+    token = uuid.uuid4().hex
+    now = time.monotonic()
+    with _local_locks_guard:
+        held = _local_locks.get(lock_key)
+        if held is not None and held[1] > now:
+            return None
+        _local_locks[lock_key] = (token, now + timeout)
+    return token
+
+
+def _release_sync(lock_key: str, token: str):
+    client = get_redis()
+    if client is not None:
+        release_lock(client, lock_key, token)
+        return
+    with _local_locks_guard:
+        if _local_locks.get(lock_key, (None,))[0] == token:
+            del _local_locks[lock_key]
+
+
+def _is_locked_sync(lock_key: str) -> bool:
+    client = get_redis()
+    if client is not None:
+        return bool(client.exists(lock_key))
+    with _local_locks_guard:
+        held = _local_locks.get(lock_key)
+        return held is not None and held[1] > time.monotonic()
+
+
+# Клиент Redis синхронный: вызовы - в пуле потоков, не в event loop
+_acquire = sync_to_async(_acquire_sync, thread_sensitive=False)
+_release = sync_to_async(_release_sync, thread_sensitive=False)
+_is_locked = sync_to_async(_is_locked_sync, thread_sensitive=False)
+
+
+async def _load_with_lock(key: str, day: date_type, loader: Callable[[], Awaitable[Dict]]) -> Dict:
+    """Между процессами грузит только владелец блокировки, остальные ждут его результат"""
+    lock_key = key + ':lock'
+    token = await _acquire(lock_key)
+    if token is not None:
+        try:
+            data = await loader()
+            await _store(key, day, data)
+            return data
+        finally:
+            await _release(lock_key, token)
+
+    deadline = time.monotonic() + settings.NEWS_CACHE_LOCK_TIMEOUT
+    while time.monotonic() < deadline:
+        await asyncio.sleep(0.1)
+        entry = await cache.aget(key)
+        if entry is not None:
+            return entry['data']
+        if not await _is_locked(lock_key):
+            break
+    # Владелец блокировки не справился - грузим сами
+    return await loader()
+
+
+async def _load_single_flight(key: str, day: date_type, loader: Callable[[], Awaitable[Dict]]) -> Dict:
+    tasks = _inflight.setdefault(asyncio.get_running_loop(), {})
+    task = tasks.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_load_with_lock(key, day, loader))
+        tasks[key] = task
+        task.add_done_callback(lambda _: tasks.pop(key, None))
+    return await asyncio.shield(task)
+
+
+async def _refresh_in_background(key: str, day: date_type, loader: Callable[[], Awaitable[Dict]]):
+    lock_key = key + ':lock'
+    token = await _acquire(lock_key)
+    if token is None:
+        return  # уже обновляет другой запрос или процесс
+
+    async def refresh():
+        try:
+            await _store(key, day, await loader())
+        finally:
+            await _release(lock_key, token)
+
+    task = asyncio.ensure_future(refresh())
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+
+
+async def get_or_load(source: str, day: datetime, loader: Callable[[], Awaitable[Dict]],
+                      background: bool = True) -> Tuple[Dict, str]:
+    """
+    Новости за день из кеша по схеме stale-while-revalidate.
+
+    Свежие данные - HIT. Устаревшие отдаются сразу (STALE), а обновляет
+    их в фоне ровно один воркер: блокировка в Redis (без REDIS_URL - на процесс).
+    При промахе (MISS) одновременные запросы ждут одну загрузку.
+    background=False (WSGI, где event loop живет один запрос) - вместо
+    фонового обновления устаревшие данные грузятся сразу.
+    """
+    day = day.date() if isinstance(day, datetime) else day
+    key = news_cache_key(source, day)
+    entry = await cache.aget(key)
+
+    if entry is not None:
+        if entry['fresh_until'] > time.time():
+            return entry['data'], HIT
+        if background:
+            await _refresh_in_background(key, day, loader)
+            return entry['data'], STALE
+
+    return await _load_single_flight(key, day, loader), MISS
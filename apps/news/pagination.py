@@ -0,0 +1,95 @@
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Курсорная пагинация по (published_at, id) для ленты статей.
+
+    Страница - это условие "строго раньше/позже курсора" по составному
+    индексу (-published_at, -id), поэтому первая и десятитысячная
+    страницы стоят одинаково. Курсор непрозрачен для клиента.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'per_page'
+    page_size = 10
+    max_page_size = 100
+    invalid_cursor_message = 'Неверный курсор'
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    @staticmethod
+    def encode_cursor(direction: str, article) -> str:
+        raw = f'{direction}|{article.published_at.isoformat()}|{article.pk}'
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4)).decode()
+            direction, published_at, pk = raw.split('|')
+            if direction not in ('n', 'p'):
+                raise ValueError(direction)
+            return direction, datetime.fromisoformat(published_at), int(pk)
+        except (ValueError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+
+        if cursor is None:
+            queryset = queryset.order_by('-published_at', '-id')
+            backwards = False
+        else:
+            direction, published_at, pk = cursor
+            backwards = direction == 'p'
+            if backwards:
+                queryset = queryset.filter(
+                    Q(published_at__gt=published_at) | Q(published_at=published_at, id__gt=pk)
+                ).order_by('published_at', 'id')
+            else:
+                queryset = queryset.filter(
+                    Q(published_at__lt=published_at) | Q(published_at=published_at, id__lt=pk)
+                ).order_by('-published_at', '-id')
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if backwards:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, cursor is not None
+
+        self.next_cursor = self.encode_cursor('n', rows[-1]) if rows and has_next else None
+        self.previous_cursor = self.encode_cursor('p', rows[0]) if rows and has_previous else None
+        return rows
+
+    def _link(self, cursor):
+        if cursor is None:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), 'page')
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self._link(self.next_cursor),
+            'previous': self._link(self.previous_cursor),
+            'per_page': self.page_size,
+            'articles': data,
+        })
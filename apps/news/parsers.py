@@ -1,47 +1,458 @@
+import asyncio
+import hashlib
+import logging
+import os
+import random
+import weakref
 import aiohttp
+from collections import defaultdict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from bs4 import BeautifulSoup
+from lxml import etree, html as lxml_html
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import AsyncIterator, Awaitable, Callable, Iterable, List, Dict, Optional, Set
+from urllib.parse import urljoin, urlsplit
+from django.conf import settings
+from django.core.cache import cache
 
+logger = logging.getLogger(__name__)
 
+
+DEFAULT_PARSER_SETTINGS = {
+    'CONNECTION_LIMIT': 100,     # всего соединений в пуле
+    'LIMIT_PER_HOST': 10,        # соединений на один хост
+    'DNS_CACHE_TTL': 300,        # секунды
+    'KEEPALIVE_TIMEOUT': 30,     # секунды
+    'TIMEOUT': 30,               # общий таймаут запроса, секунды
+    'CONNECT_TIMEOUT': 10,       # таймаут установки соединения, секунды
+    'MAX_CONCURRENCY': 10,       # одновременных запросов на парсер
+    'VALIDATORS_TTL': 7 * 86400, # сколько хранить ETag/Last-Modified/хеш страницы
+    'PARSE_EXECUTOR': 'thread',  # thread | process | sync - где разбирать HTML
+    'PARSE_ENGINE': 'lxml',      # lxml | bs4 - движок разбора списка статей
+    'PARSE_WORKERS': os.cpu_count() or 1,
+    'RETRIES': 2,                # повторов при сетевой ошибке, 429 и 5xx
+    'RETRY_BACKOFF': 0.5,        # базовая пауза между повторами, секунды (растет как 2**n)
+    'HOST_RATE_LIMIT': 5,        # запросов в секунду на один хост, 0 - без ограничения
+    'MAX_PAGES': 10,             # сколько страниц списка за дату проходить максимум
+}
+
+# Результат условного запроса: страница не изменилась с прошлого раза
+NOT_MODIFIED = object()
+# Результат запроса: сайт отвечал 429/5xx на все попытки (в отличие от None - страницы нет)
+UNAVAILABLE = object()
+
+
+def get_parser_settings(**overrides) -> Dict:
+    """Настройки парсера: значения по умолчанию + settings.NEWS_PARSER + overrides"""
+    options = dict(DEFAULT_PARSER_SETTINGS)
+    options.update(getattr(settings, 'NEWS_PARSER', {}))
+    options.update(overrides)
+    return options
+
+
+# Пулы для разбора HTML, общие для всех парсеров процесса: (тип, размер) -> пул
+_parse_executors: Dict[tuple, Executor] = {}
+
+
+def get_parse_executor(kind: str, workers: int) -> Optional[Executor]:
+    """Пул потоков/процессов для разбора HTML; None для синхронного режима"""
+    if kind == 'sync':
+        return None
+    key = (kind, workers)
+    if key not in _parse_executors:
+        if kind == 'process':
+            _parse_executors[key] = ProcessPoolExecutor(max_workers=workers)
+        elif kind == 'thread':
+            _parse_executors[key] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='news-parse')
+        else:
+            raise ValueError(f'Неизвестный PARSE_EXECUTOR: {kind}')
+    return _parse_executors[key]
+
+
+def extract_articles_bs4(html: str) -> List[Dict]:
+    """Парсинг списка статей через BeautifulSoup (эталонный движок)"""
+    soup = BeautifulSoup(html, 'lxml')
+    articles = []
+
+    for item in soup.select('.Tag--article'):
+        try:
+            title = item.select_one('.ArticleItem--name').text.strip()
+            url = item.select_one('.ArticleItem--name')['href']
+            time = item.select_one('.ArticleItem--time').text.strip()
+
+            articles.append({
+                'title': title,
+                'url': url,
+                'time': time,
+                'source': 'Kaktus Media'
+            })
+        except Exception:
+            logger.warning('Ошибка парсинга статьи', exc_info=True)
+            continue
+
+    return articles
+
+
+def _class_xpath(name: str) -> str:
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+_ARTICLE_NODES = etree.XPath(f"//*[{_class_xpath('Tag--article')}]")
+_ARTICLE_NAME = etree.XPath(f"(.//*[{_class_xpath('ArticleItem--name')}])[1]")
+_ARTICLE_TIME = etree.XPath(f"(.//*[{_class_xpath('ArticleItem--time')}])[1]")
+
+
+def extract_articles_lxml(html: str) -> List[Dict]:
+    """
+    Парсинг списка статей через XPath по дереву lxml.
+
+    Вместо дерева BeautifulSoup и трех CSS-запросов на статью - одно
+    скомпилированное XPath-выражение на каждое поле. Результат совпадает
+    с extract_articles_bs4.
+    """
+    if not html or not html.strip():
+        return []
+    root = lxml_html.fromstring(html)
+    articles = []
+
+    for item in _ARTICLE_NODES(root):
+        try:
+            name = _ARTICLE_NAME(item)[0]
+            url = name.attrib['href']
+            time = _ARTICLE_TIME(item)[0]
+
+            articles.append({
+                'title': name.text_content().strip(),
+                'url': url,
+                'time': time.text_content().strip(),
+                'source': 'Kaktus Media'
+            })
+        except Exception:
+            logger.warning('Ошибка парсинга статьи', exc_info=True)
+            continue
+
+    return articles
+
+
+PARSE_ENGINES = {
+    'bs4': extract_articles_bs4,
+    'lxml': extract_articles_lxml,
+}
+
+_DETAIL_BODY = etree.XPath(f"(//*[{_class_xpath('BbCode')}] | //article)[1]")
+_DETAIL_OG_IMAGE = etree.XPath("//meta[@property='og:image']/@content")
+
+
+def extract_article_detail(html: str) -> Dict:
+    """Текст и главное изображение со страницы статьи"""
+    content = ''
+    image_url = None
+    if not html or not html.strip():
+        return {'content': content, 'image_url': image_url}
+    root = lxml_html.fromstring(html)
+
+    body = _DETAIL_BODY(root)
+    if body:
+        paragraphs = [p.text_content().strip() for p in body[0].iter('p')]
+        paragraphs = [p for p in paragraphs if p]
+        content = '\n\n'.join(paragraphs) if paragraphs else body[0].text_content().strip()
+
+    images = _DETAIL_OG_IMAGE(root)
+    if not images and body:
+        images = body[0].xpath('.//img/@src')
+    if images:
+        image_url = images[0].strip() or None
+
+    return {'content': content, 'image_url': image_url}
+
+
+class HostRateLimiter:
+    """Не больше rate запросов в секунду на хост: запросы выстраиваются с равным интервалом"""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate else 0
+        self._next_at: Dict[str, float] = {}
+        self._locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+    async def wait(self, host: str):
+        if not self.interval:
+            return
+        async with self._locks[host]:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            next_at = self._next_at.get(host, now)
+            if next_at > now:
+                await asyncio.sleep(next_at - now)
+            self._next_at[host] = max(now, next_at) + self.interval
+
+
+# Парсеры по домену источника: 'kaktus.media' -> KaktusMediaParser
+PARSERS: Dict[str, type] = {}
+
+
+def source_domain(url: str) -> str:
+    """Домен источника без www: по нему сопоставляются парсеры и записи Source"""
+    netloc = urlsplit(url).netloc.lower()
+    return netloc[4:] if netloc.startswith('www.') else netloc
+
+
+def register_parser(parser_class):
+    """Декоратор: регистрирует парсер для домена его BASE_URL"""
+    PARSERS[source_domain(parser_class.BASE_URL)] = parser_class
+    return parser_class
+
+
+def get_parser_class(url: str):
+    """Класс парсера для url источника или None, если парсера нет"""
+    return PARSERS.get(source_domain(url))
+
+
+@register_parser
 class KaktusMediaParser:
     BASE_URL = "https://kaktus.media"
 
+    def __init__(self, **options):
+        self.options = get_parser_settings(**options)
+        self.session: Optional[aiohttp.ClientSession] = None
+        self._semaphore = asyncio.Semaphore(self.options['MAX_CONCURRENCY'])
+        self._rate_limiter = HostRateLimiter(self.options['HOST_RATE_LIMIT'])
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def open(self):
+        """Создание долгоживущей сессии с пулом keep-alive соединений"""
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.options['CONNECTION_LIMIT'],
+                limit_per_host=self.options['LIMIT_PER_HOST'],
+                ttl_dns_cache=self.options['DNS_CACHE_TTL'],
+                keepalive_timeout=self.options['KEEPALIVE_TIMEOUT'],
+            )
+            timeout = aiohttp.ClientTimeout(
+                total=self.options['TIMEOUT'],
+                connect=self.options['CONNECT_TIMEOUT'],
+            )
+            self.session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        return self.session
+
+    async def close(self):
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        self.session = None
+
+    @staticmethod
+    def _validators_key(url: str) -> str:
+        return 'news:validators:' + hashlib.sha1(url.encode()).hexdigest()
+
+    async def _get(self, url: str, conditional: bool = False, validators: Optional[Dict] = None):
+        """
+        GET через общую сессию; число одновременных запросов ограничено.
+
+        Сетевые ошибки, 429 и 5xx повторяются RETRIES раз с экспоненциальной
+        паузой, запросы к одному хосту не чаще HOST_RATE_LIMIT в секунду.
+        None - страницы нет (404 и прочие), UNAVAILABLE - 429/5xx на всех
+        попытках.
+
+        При conditional=True отправляет If-None-Match/If-Modified-Since по
+        сохраненным в кеше валидаторам и возвращает NOT_MODIFIED на 304
+        или если хеш тела совпал с прошлым. Новые валидаторы записываются
+        в validators[url]; сохранять их (save_validators) можно только
+        после записи статей страницы в БД.
+        """
+        session = await self.open()
+        headers = {}
+        previous = None
+        if conditional:
+            previous = await cache.aget(self._validators_key(url))
+            if previous:
+                if previous.get('etag'):
+                    headers['If-None-Match'] = previous['etag']
+                if previous.get('last_modified'):
+                    headers['If-Modified-Since'] = previous['last_modified']
+
+        host = urlsplit(url).netloc
+        retries = self.options['RETRIES']
+        for attempt in range(retries + 1):
+            if attempt:
+                backoff = self.options['RETRY_BACKOFF'] * 2 ** (attempt - 1)
+                await asyncio.sleep(backoff + random.uniform(0, backoff / 2))
+            try:
+                # Очередь лимита частоты - до семафора: ожидающие своей очереди
+                # запросы не занимают слоты MAX_CONCURRENCY других хостов
+                await self._rate_limiter.wait(host)
+                async with self._semaphore:
+                    async with session.get(url, headers=headers) as response:
+                        if response.status == 304:
+                            return NOT_MODIFIED
+                        if response.status == 429 or response.status >= 500:
+                            if attempt < retries:
+                                continue
+                            return UNAVAILABLE
+                        if response.status != 200:
+                            return None
+                        html = await response.text()
+                        etag = response.headers.get('ETag')
+                        last_modified = response.headers.get('Last-Modified')
+                        break
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                if attempt >= retries:
+                    raise
+
+        if conditional:
+            digest = hashlib.sha256(html.encode()).hexdigest()
+            if validators is not None:
+                validators[url] = {'etag': etag, 'last_modified': last_modified, 'hash': digest}
+            if previous and previous.get('hash') == digest:
+                return NOT_MODIFIED
+        return html
+
+    async def save_validators(self, validators: Dict[str, Dict]):
+        """Валидаторы страниц из _get - в кеш, когда статьи этих страниц уже в БД"""
+        for url, values in validators.items():
+            await cache.aset(self._validators_key(url), values, timeout=self.options['VALIDATORS_TTL'])
+
+    async def _run_parse(self, extract, html: str):
+        """Запуск синхронного разбора HTML в пуле, не блокируя event loop"""
+        executor = get_parse_executor(self.options['PARSE_EXECUTOR'], self.options['PARSE_WORKERS'])
+        if executor is None:
+            return extract(html)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, extract, html)
+
     async def parse_articles(self, html: str) -> List[Dict]:
         """Парсинг списка статей из HTML"""
-        soup = BeautifulSoup(html, 'lxml')
-        articles = []
+        return await self._run_parse(PARSE_ENGINES[self.options['PARSE_ENGINE']], html)
 
-        for item in soup.select('.Tag--article'):
-            try:
-                title = item.select_one('.ArticleItem--name').text.strip()
-                url = item.select_one('.ArticleItem--name')['href']
-                time = item.select_one('.ArticleItem--time').text.strip()
-
-                articles.append({
-                    'title': title,
-                    'url': url,
-                    'time': time,
-                    'source': 'Kaktus Media'
-                })
-            except Exception as e:
-                print(f"Ошибка парсинга статьи: {e}")
-                continue
-
-        return articles
+    async def fetch_article_detail(self, url: str) -> Optional[Dict]:
+        """Текст и изображение одной статьи"""
+        html = await self._get(url)
+        if html is None or html is UNAVAILABLE:
+            return None
+        return await self._run_parse(extract_article_detail, html)
+
+    async def fetch_article_details(self, urls: Iterable[str]) -> Dict[str, Dict]:
+        """
+        Параллельная загрузка страниц статей.
+
+        Параллелизм ограничен MAX_CONCURRENCY, частота - HOST_RATE_LIMIT.
+        Статьи, которые не удалось загрузить, в результат не попадают.
+        """
+        urls = list(urls)
+        results = await asyncio.gather(
+            *(self.fetch_article_detail(url) for url in urls),
+            return_exceptions=True,
+        )
+        return {url: result for url, result in zip(urls, results) if isinstance(result, dict)}
+
+    def listing_url(self, date_str: str, page: int = 1) -> str:
+        url = f"{self.BASE_URL}/?lable=8&date={date_str}&order=time"
+        return url if page == 1 else f"{url}&page={page}"
+
+    async def iter_articles(self, date: datetime, conditional: bool = False,
+                            known_urls: Optional[Callable[[List[str]], Awaitable[Set[str]]]] = None,
+                            stats: Optional[Dict] = None) -> AsyncIterator[Dict]:
+        """
+        Статьи за дату по мере разбора страниц списка.
+
+        Идет по страницам (не больше MAX_PAGES), пока они не кончатся.
+        known_urls - корутина, которая по списку абсолютных url страницы
+        возвращает уже сохраненные: на первой такой статье обход
+        останавливается, так как список отсортирован по времени.
+        В stats записываются pages, not_modified, truncated и failed: failed -
+        первая страница недоступна, сайт не ответил на одну из следующих или
+        список не кончился за MAX_PAGES страниц (truncated), то есть статьи
+        за дату получены не все. При conditional=True в
+        stats['validators'] - валидаторы для save_validators.
+        """
+        stats = stats if stats is not None else {}
+        stats.update(pages=0, not_modified=False, truncated=False, failed=False, validators={})
+        date_str = date.strftime("%Y-%m-%d")
+        seen = set()
+
+        for page in range(1, self.options['MAX_PAGES'] + 1):
+            # Изменения видны на первой странице, остальные запрашиваем как есть
+            html = await self._get(
+                self.listing_url(date_str, page), conditional=conditional and page == 1, validators=stats['validators'],
+            )
+            if html is NOT_MODIFIED:
+                stats['not_modified'] = True
+                return
+            if html is None or html is UNAVAILABLE:
+                # Нет следующей страницы - конец списка, ошибка сервера - нет
+                stats['failed'] = page == 1 or html is UNAVAILABLE
+                return
+            stats['pages'] = page
+
+            articles = [a for a in await self.parse_articles(html) if a['url'] not in seen]
+            if not articles:
+                return
+            known = set()
+            if known_urls is not None:
+                known = await known_urls([urljoin(self.BASE_URL, a['url']) for a in articles])
+
+            for article in articles:
+                if urljoin(self.BASE_URL, article['url']) in known:
+                    return
+                seen.add(article['url'])
+                yield article
+
+        # Лимит страниц исчерпан, а список не кончился
+        stats['truncated'] = stats['failed'] = True
 
     async def fetch_news(self, date: datetime) -> Dict:
-        """Получение новостей за указанную дату"""
+        """Получение новостей за указанную дату (все страницы iter_articles)"""
         date_str = date.strftime("%Y-%m-%d")
-        url = f"{self.BASE_URL}/?lable=8&date={date_str}&order=time"
+        stats = {}
+        articles = [article async for article in self.iter_articles(date, stats=stats)]
+
+        if stats['failed']:
+            # Без 'source': неполный ответ не кешируется
+            return {'date': date_str, 'articles': articles}
+        return {
+            'date': date_str,
+            'articles': articles,
+            'source': self.BASE_URL
+        }
+
+
+# Открытые парсеры по event loop: loop -> {класс парсера: экземпляр}
+_shared_parsers = weakref.WeakKeyDictionary()
+# Блокировки открытия парсеров: loop -> asyncio.Lock (Lock работает только в своем loop)
+_shared_parser_locks = weakref.WeakKeyDictionary()
+
+
+def _is_open(parser) -> bool:
+    return parser is not None and parser.session is not None and not parser.session.closed
+
+
+async def get_shared_parser(parser_class):
+    """
+    Парсер с открытой сессией, общий для всех запросов текущего event loop.
+
+    Под ASGI loop живет столько же, сколько процесс, поэтому пул
+    соединений переиспользуется между запросами. Одновременные первые
+    запросы открывают одну сессию, а не по своей на каждый.
+    """
+    loop = asyncio.get_running_loop()
+    parsers = _shared_parsers.setdefault(loop, {})
+    if _is_open(parsers.get(parser_class)):
+        return parsers[parser_class]
+    async with _shared_parser_locks.setdefault(loop, asyncio.Lock()):
+        parser = parsers.get(parser_class)
+        if not _is_open(parser):
+            parser = parser_class()
+            await parser.open()
+            parsers[parser_class] = parser
+    return parser
+
 
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                if response.status == 200:
-                    html = await response.text()
-                    return {
-                        'date': date_str,
-                        'articles': await self.parse_articles(html),
-                        'source': self.BASE_URL
-                    }
-                return {'date': date_str, 'articles': []}
\ No newline at end of file
+async def close_shared_parsers():
+    """Закрытие сессий общих парсеров текущего event loop (остановка ASGI-сервера)"""
+    parsers = _shared_parsers.pop(asyncio.get_running_loop(), {})
+    for parser in parsers.values():
+        await parser.close()
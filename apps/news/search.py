@@ -0,0 +1,151 @@
+import logging
+import re
+from importlib import import_module
+from typing import Iterable, List, Tuple
+
+from django.db import connection, connections
+from django.db.migrations.recorder import MigrationRecorder
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import Article
+
+# SQLite: FTS5-таблица с копией текста, rowid = id статьи
+FTS_TABLE = 'news_article_fts'
+# PostgreSQL: колонка tsvector в news_article с GIN-индексом (создается миграцией).
+# Заголовок, несжатый content_legacy и удаления индексируют триггеры БД
+# (миграция 0014), сжатый content - index_articles
+PG_CONFIG = 'russian'
+# Миграция с триггерами: SQL триггеров берется из нее же
+TRIGGERS_MIGRATION = ('news', '0014_article_search_triggers')
+
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+# Частые окончания русских слов: на SQLite стемминга нет, поэтому ищем по основе с префиксом
+_RU_ENDINGS = sorted((
+    'иями', 'ями', 'ами', 'ого', 'его', 'ому', 'ему', 'ыми', 'ими', 'ией', 'ий', 'ый', 'ой', 'ая', 'яя',
+    'ое', 'ее', 'ые', 'ие', 'ах', 'ях', 'ов', 'ев', 'ей', 'ам', 'ям', 'ом', 'ем', 'ую', 'юю',
+    'а', 'я', 'о', 'е', 'ы', 'и', 'у', 'ю', 'ь',
+), key=len, reverse=True)
+
+
+def _stem(word: str) -> str:
+    for ending in _RU_ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= 4:
+            return word[:-len(ending)]
+    return word
+
+
+def _fts5_query(query: str) -> str:
+    """'Выборы в Бишкеке' -> '"выбор"* "бишкек"*' (все слова, с префиксом)"""
+    words = [_stem(w.lower()) for w in _WORD_RE.findall(query) if len(w) > 1]
+    return ' '.join(f'"{w}"*' for w in words)
+
+
+def is_supported() -> bool:
+    return connection.vendor in ('sqlite', 'postgresql')
+
+
+def index_articles(articles: Iterable[Tuple[int, str, str]]):
+    """Обновление поискового индекса для (id, title, content)"""
+    rows = [(pk, title or '', content or '') for pk, title, content in articles]
+    if not rows or not is_supported():
+        return
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [(pk,) for pk, _, _ in rows])
+            cursor.executemany(f'INSERT INTO {FTS_TABLE} (rowid, title, content) VALUES (%s, %s, %s)', rows)
+        else:
+            cursor.executemany(
+                f"UPDATE news_article SET search_vector = "
+                f"setweight(to_tsvector('{PG_CONFIG}', %s), 'A') || setweight(to_tsvector('{PG_CONFIG}', %s), 'B') "
+                f"WHERE id = %s",
+                [(title, content, pk) for pk, title, content in rows],
+            )
+
+
+def restore_triggers(using: str = 'default') -> List[str]:
+    """
+    Пересоздает недостающие триггеры индекса на SQLite, возвращает их имена.
+
+    SQLite выполняет AlterField/RemoveField через копию таблицы, и триггеры
+    news_article пропадают вместе со старой таблицей без ошибок.
+    """
+    db = connections[using]
+    if db.vendor != 'sqlite' or TRIGGERS_MIGRATION not in MigrationRecorder(db).applied_migrations():
+        return []
+    statements = import_module(f'apps.news.migrations.{TRIGGERS_MIGRATION[1]}').SQLITE_TRIGGERS
+    with db.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'news_article'")
+        existing = {row[0] for row in cursor.fetchall()}
+        restored = []
+        for statement in statements:
+            name = re.search(r'CREATE TRIGGER (\w+)', statement).group(1)
+            if name not in existing:
+                cursor.execute(statement)
+                restored.append(name)
+    if restored:
+        logger.warning('Восстановлены триггеры поискового индекса: %s', ', '.join(restored))
+    return restored
+
+
+def index_article_ids(ids: Iterable[int]):
+    """Переиндексация статей по id"""
+    ids = list(ids)
+    if ids:
+        rows = Article.objects.filter(pk__in=ids).values_list('id', 'title', 'content', 'content_legacy')
+        index_articles((pk, title, content or legacy) for pk, title, content, legacy in rows)
+
+
+def search_filter(query: str) -> Q:
+    """Условие для QuerySet статей: все найденные по запросу, без предела и ранжирования"""
+    if connection.vendor == 'sqlite':
+        match = _fts5_query(query)
+        if not match:
+            return Q(pk__in=[])
+        return Q(pk__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match]))
+    if connection.vendor == 'postgresql':
+        return Q(pk__in=RawSQL(
+            f"SELECT id FROM news_article WHERE search_vector @@ websearch_to_tsquery('{PG_CONFIG}', %s)", [query],
+        ))
+    return Q(title__icontains=query)
+
+
+def search_ids(query: str, limit: int = 20, offset: int = 0) -> Tuple[List[int], int]:
+    """Id статей по релевантности (заголовок весит больше текста) и общее число найденных"""
+    if not query.strip():
+        return [], 0
+
+    if connection.vendor == 'sqlite':
+        match = _fts5_query(query)
+        if not match:
+            return [], 0
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT count(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match])
+            total = cursor.fetchone()[0]
+            cursor.execute(
+                f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+                f'ORDER BY bm25({FTS_TABLE}, 10.0, 1.0) LIMIT %s OFFSET %s',
+                [match, limit, offset],
+            )
+            return [row[0] for row in cursor.fetchall()], total
+
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT count(*) FROM news_article WHERE search_vector @@ websearch_to_tsquery('{PG_CONFIG}', %s)",
+                [query],
+            )
+            total = cursor.fetchone()[0]
+            cursor.execute(
+                f"SELECT id FROM news_article, websearch_to_tsquery('{PG_CONFIG}', %s) q "
+                f"WHERE search_vector @@ q "
+                f"ORDER BY ts_rank_cd(search_vector, q) DESC, published_at DESC LIMIT %s OFFSET %s",
+                [query, limit, offset],
+            )
+            return [row[0] for row in cursor.fetchall()], total
+
+    # Прочие СУБД: без индекса, только по заголовку
+    queryset = Article.objects.filter(title__icontains=query).order_by('-published_at', '-id')
+    return list(queryset.values_list('id', flat=True)[offset:offset + limit]), queryset.count()
@@ -0,0 +1,106 @@
+from datetime import datetime, timedelta
+from typing import Dict, List
+from urllib.parse import urljoin
+
+from django.db.models import F
+from django.utils import timezone
+
+from .archive import iter_exported
+from .models import Article, ArchivedArticle, Source
+from .parsers import source_domain
+
+
+def day_range(date: datetime):
+    """Границы суток [начало, начало следующих) в текущей таймзоне"""
+    start = timezone.make_aware(datetime.combine(date.date(), datetime.min.time()))
+    return start, start + timedelta(days=1)
+
+
+def serialize_article(article: Article) -> Dict:
+    """Статья в формате ответа парсера: title/url/time/source"""
+    return {
+        'title': article.title,
+        'url': article.url,
+        'time': timezone.localtime(article.published_at).strftime("%H:%M"),
+        'source': article.source.name,
+    }
+
+
+def get_feed_queryset():
+    """Статьи ленты с источником, без тяжелых колонок"""
+    return Article.objects.select_related('source').only('title', 'url', 'published_at', 'source__name')
+
+
+def get_articles_by_ids(ids: List[int]) -> List[Article]:
+    """Статьи ленты одним запросом в порядке ids"""
+    articles = get_feed_queryset().in_bulk(ids)
+    return [articles[pk] for pk in ids if pk in articles]
+
+
+def collapse_duplicates(articles: List[Dict], base_url: str = '') -> List[Dict]:
+    """
+    Статьи ответа (из БД или парсера) без почти-дубликатов, как collapse=1 для QuerySet.
+
+    Кластеры - одним запросом по url; еще не сохраненные статьи остаются.
+    """
+    urls = {urljoin(base_url, article['url']) for article in articles}
+    duplicates = set(
+        Article.objects
+        .filter(url__in=urls, cluster_id__isnull=False)
+        .exclude(cluster_id=F('id'))
+        .values_list('url', flat=True)
+    )
+    return [article for article in articles if urljoin(base_url, article['url']) not in duplicates]
+
+
+def get_source_ids(source_url: str) -> List[int]:
+    """Id источников с доменом source_url: url из админки может отличаться www и путем"""
+    domain = source_domain(source_url)
+    return [pk for pk, url in Source.objects.order_by('id').values_list('id', 'url') if source_domain(url) == domain]
+
+
+def get_stored_articles(date: datetime, source_url: str = '') -> List[Dict]:
+    """Статьи за сутки из БД по индексу -published_at; с source_url - только этого источника"""
+    start, end = day_range(date)
+    queryset = (
+        get_feed_queryset()
+        .filter(published_at__gte=start, published_at__lt=end)
+        .order_by('-published_at', '-id')
+    )
+    if source_url:
+        queryset = queryset.filter(source_id__in=get_source_ids(source_url))
+    return [serialize_article(article) for article in queryset]
+
+
+def get_stored_news(date: datetime, source_url: str = '') -> Dict:
+    """Новости за дату в том же формате, что KaktusMediaParser.fetch_news"""
+    return {
+        'date': date.strftime("%Y-%m-%d"),
+        'articles': get_stored_articles(date, source_url),
+        'source': source_url,
+    }
+
+
+def get_archived_news(date: datetime, source_url: str = '') -> Dict:
+    """Новости за дату из архива: таблица ArchivedArticle, иначе выгрузка jsonl.gz"""
+    start, end = day_range(date)
+    queryset = (
+        ArchivedArticle.objects
+        .select_related('source')
+        .only('title', 'url', 'published_at', 'source__name')
+        .filter(published_at__gte=start, published_at__lt=end)
+        .order_by('-published_at', '-id')
+    )
+    articles = [serialize_article(article) for article in queryset]
+    if not articles:
+        exported = sorted(iter_exported(date.date()), key=lambda row: (row['published_at'], row['id']), reverse=True)
+        articles = [
+            {
+                'title': row['title'],
+                'url': row['url'],
+                'time': timezone.localtime(row['published_at']).strftime("%H:%M"),
+                'source': row['source__name'],
+            }
+            for row in exported
+        ]
+    return {'date': date.strftime("%Y-%m-%d"), 'articles': articles, 'source': source_url}
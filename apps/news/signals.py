@@ -0,0 +1,64 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_migrate, post_save
+from django.dispatch import receiver
+
+from .feeds import rebuild_feed
+from .filters import SQLITE_UPPER
+from .models import Article
+from .search import index_articles, restore_triggers
+
+User = get_user_model()
+
+
+@receiver(connection_created)
+def register_sqlite_functions(sender, connection, **kwargs):
+    """UPPER с кириллицей для фильтра по заголовку (filters.UnicodeUpper)"""
+    if connection.vendor == 'sqlite':
+        connection.connection.create_function(
+            SQLITE_UPPER, 1, lambda value: value.upper() if value is not None else None, deterministic=True,
+        )
+
+
+@receiver(post_migrate)
+def restore_search_triggers(sender, using, **kwargs):
+    """Триггеры индекса после миграций, пересоздавших news_article на SQLite"""
+    if sender.name == 'apps.news':
+        restore_triggers(using)
+
+
+@receiver(post_save, sender=Article)
+def index_saved_article(sender, instance, **kwargs):
+    """
+    Текст из админки и прочих save() - в поисковый индекс.
+
+    Заголовок и удаление индексируют триггеры БД, но сжатый content
+    им недоступен.
+    """
+    update_fields = kwargs.get('update_fields')
+    if update_fields and 'content' not in update_fields:
+        return
+    index_articles([(instance.pk, instance.title, instance.content or instance.content_legacy)])
+
+
+@receiver(m2m_changed, sender=User.subscribed_sources.through)
+@receiver(m2m_changed, sender=User.subscribed_categories.through)
+def rebuild_feed_on_subscription_change(sender, instance, action, reverse, **kwargs):
+    """
+    Новые подписки сразу дают ленту из уже собранных статей.
+
+    Лента пересобирается один раз на транзакцию, сколько бы связей
+    в ней ни поменялось (PUT подписок меняет и источники, и категории).
+    """
+    if action not in ('post_add', 'post_remove', 'post_clear') or reverse:
+        return
+    if getattr(instance, '_feed_rebuild_pending', False):
+        return
+    instance._feed_rebuild_pending = True
+
+    def rebuild():
+        instance._feed_rebuild_pending = False
+        rebuild_feed(instance)
+
+    transaction.on_commit(rebuild)
@@ -0,0 +1,247 @@
+"""
+Поток новых статей по Server-Sent Events (GET /api/news/stream/).
+
+Отдается голым ASGI-приложением из core/asgi.py, мимо middleware и
+представлений Django: простаивающее соединение - это одна корутина и
+очередь, поэтому воркер держит тысячи клиентов вместо их опроса
+/api/news/latest/.
+"""
+import asyncio
+import json
+import logging
+from typing import Dict, Iterable, List, Optional, Set
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Max
+
+from core.redis import get_redis
+from .models import Article
+from .selectors import get_articles_by_ids, get_feed_queryset, serialize_article
+
+logger = logging.getLogger(__name__)
+
+STREAM_PATH = '/api/news/stream/'
+CHANNEL = 'news:articles'
+
+
+def _payload(articles: Iterable[Article]) -> List[Dict]:
+    return [{'id': article.pk, **serialize_article(article)} for article in articles]
+
+
+class Subscriber:
+    """Соединение клиента: ограниченная очередь, переполнение - отключение"""
+
+    def __init__(self, maxsize: int):
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.overflowed = asyncio.Event()
+
+    def offer(self, article: Dict):
+        if self.overflowed.is_set():
+            return
+        try:
+            self.queue.put_nowait(article)
+        except asyncio.QueueFull:
+            # Медленный клиент не копит память воркера: соединение закрывается,
+            # клиент переподключается с Last-Event-ID и догружает пропущенное из БД
+            self.overflowed.set()
+
+
+class Broker:
+    """
+    Рассылка статей подписчикам процесса.
+
+    С REDIS_URL статьи приходят через pub/sub (публикует ingestion в
+    любом процессе). Без него - опросом БД раз в NEWS_STREAM_POLL_INTERVAL
+    секунд: статьи пишут задачи Celery и команды, а не ASGI-процесс.
+    Один запрос на процесс, а не на соединение.
+    """
+
+    def __init__(self):
+        self.subscribers: Set[Subscriber] = set()
+        self.listener: Optional[asyncio.Task] = None
+
+    def subscribe(self) -> Subscriber:
+        subscriber = Subscriber(settings.NEWS_STREAM_QUEUE_SIZE)
+        self.subscribers.add(subscriber)
+        listener = self.listener
+        if listener is None or listener.done() or listener.get_loop() is not asyncio.get_running_loop():
+            self.listener = asyncio.ensure_future(self.listen() if settings.REDIS_URL else self.poll())
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self.subscribers.discard(subscriber)
+
+    def dispatch(self, articles: List[Dict]):
+        for subscriber in list(self.subscribers):
+            for article in articles:
+                subscriber.offer(article)
+
+    async def poll(self):
+        """Новые статьи из БД, пока есть подписчики; id статей растут"""
+        last_id = await sync_to_async(_last_article_id)()
+        while self.subscribers:
+            await asyncio.sleep(settings.NEWS_STREAM_POLL_INTERVAL)
+            try:
+                articles = await sync_to_async(_replay)(last_id, settings.NEWS_STREAM_REPLAY_LIMIT)
+            except Exception as e:
+                logger.warning('Опрос новых статей для потока не удался: %s', e)
+                continue
+            if articles:
+                last_id = articles[-1]['id']
+                self.dispatch(articles)
+
+    async def listen(self):
+        import redis.asyncio as aioredis
+
+        while True:
+            client = aioredis.Redis.from_url(settings.REDIS_URL)
+            try:
+                async with client.pubsub() as pubsub:
+                    await pubsub.subscribe(CHANNEL)
+                    async for message in pubsub.listen():
+                        if message['type'] == 'message':
+                            self.dispatch(json.loads(message['data']))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning('Подписка на %s прервана: %s', CHANNEL, e)
+                await asyncio.sleep(1)
+            finally:
+                await client.aclose()
+
+
+broker = Broker()
+
+
+def publish_articles(article_ids: Iterable[int]):
+    """
+    Новые статьи - в поток через Redis; вызывается после коммита ingest_articles.
+
+    Без Redis ничего не делает: потоки сами находят статьи опросом БД.
+    """
+    article_ids = sorted(article_ids)
+    client = get_redis()
+    if not article_ids or client is None:
+        return
+    articles = _payload(get_articles_by_ids(article_ids))
+    try:
+        client.publish(CHANNEL, json.dumps(articles, ensure_ascii=False))
+    except Exception as e:
+        logger.warning('Не удалось опубликовать статьи в поток: %s', e)
+
+
+def _last_article_id() -> int:
+    try:
+        return Article.objects.aggregate(last=Max('id'))['last'] or 0
+    finally:
+        close_old_connections()
+
+
+def _replay(last_id: int, limit: int) -> List[Dict]:
+    """Статьи после Last-Event-ID (id статей растут), старые первыми"""
+    try:
+        queryset = get_feed_queryset().filter(pk__gt=last_id).order_by('id')[:limit]
+        return _payload(queryset)
+    finally:
+        close_old_connections()
+
+
+def _authenticate(token: str):
+    from rest_framework.exceptions import AuthenticationFailed
+    from rest_framework_simplejwt.exceptions import TokenError
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    from apps.users.authentication import CachedJWTAuthentication
+
+    try:
+        return CachedJWTAuthentication().get_user(AccessToken(token))
+    except (TokenError, AuthenticationFailed):
+        return None
+    finally:
+        close_old_connections()
+
+
+def _event(article: Dict) -> bytes:
+    return f"id: {article['id']}\nevent: article\ndata: {json.dumps(article, ensure_ascii=False)}\n\n".encode()
+
+
+async def _respond(send, status: int, message: str):
+    await send({'type': 'http.response.start', 'status': status,
+                'headers': [(b'content-type', b'application/json; charset=utf-8')]})
+    await send({'type': 'http.response.body', 'body': json.dumps({'error': message}, ensure_ascii=False).encode()})
+
+
+async def news_stream(scope, receive, send):
+    """
+    ASGI-приложение потока.
+
+    Токен - в Authorization: Bearer или ?token= (EventSource не ставит
+    заголовки). Last-Event-ID (заголовок или ?last_event_id=) - id
+    последней полученной статьи: пропущенные догружаются из БД.
+    """
+    if scope['method'] != 'GET':
+        return await _respond(send, 405, 'Метод не поддерживается')
+
+    headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope['headers']}
+    query = {key: values[-1] for key, values in parse_qs(scope.get('query_string', b'').decode()).items()}
+    authorization = headers.get('authorization', '')
+    token = authorization[7:] if authorization.lower().startswith('bearer ') else query.get('token', '')
+    user = await sync_to_async(_authenticate)(token) if token else None
+    if user is None:
+        return await _respond(send, 401, 'Нужен действительный access-токен')
+
+    last_event_id = headers.get('last-event-id') or query.get('last_event_id')
+    try:
+        last_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_id = None
+
+    # Подписка до догрузки из БД, чтобы не потерять статьи между ними
+    subscriber = broker.subscribe()
+    disconnected = asyncio.ensure_future(_wait_disconnect(receive))
+    try:
+        await send({'type': 'http.response.start', 'status': 200, 'headers': [
+            (b'content-type', b'text/event-stream; charset=utf-8'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'),
+        ]})
+        await send({'type': 'http.response.body', 'body': b'retry: 3000\n\n', 'more_body': True})
+
+        replayed = set()
+        if last_id is not None:
+            for article in await sync_to_async(_replay)(last_id, settings.NEWS_STREAM_REPLAY_LIMIT):
+                await send({'type': 'http.response.body', 'body': _event(article), 'more_body': True})
+                replayed.add(article['id'])
+
+        overflowed = asyncio.ensure_future(subscriber.overflowed.wait())
+        while not disconnected.done() and not overflowed.done():
+            getter = asyncio.ensure_future(subscriber.queue.get())
+            done, _ = await asyncio.wait(
+                {getter, disconnected, overflowed},
+                timeout=settings.NEWS_STREAM_KEEPALIVE, return_when=asyncio.FIRST_COMPLETED,
+            )
+            if getter not in done:
+                getter.cancel()
+                if not done:
+                    # Комментарий SSE держит соединение живым через прокси
+                    await send({'type': 'http.response.body', 'body': b': ping\n\n', 'more_body': True})
+                continue
+            article = getter.result()
+            if article['id'] not in replayed:  # иначе уже отправлена при догрузке
+                await send({'type': 'http.response.body', 'body': _event(article), 'more_body': True})
+        overflowed.cancel()
+        if not disconnected.done():
+            await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+    except OSError:
+        pass  # клиент ушел во время записи
+    finally:
+        broker.unsubscribe(subscriber)
+        disconnected.cancel()
+
+
+async def _wait_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
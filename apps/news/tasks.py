@@ -1,26 +1,44 @@
-from .parsers import KaktusMediaParser
-from django.core.cache import cache
 import asyncio
 
+from celery import shared_task
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
 
+from core.redis import acquire_lock, get_redis, release_lock
+from .crawler import crawl_due_sources
 
-def parse_kaktus_news_task():
-    """Celery задача для парсинга новостей"""
+CRAWL_LOCK_KEY = 'news:crawl-lock'
 
-    async def async_parse():
-        async with KaktusMediaParser() as parser:
-            return await parser.fetch_news(days=2)
+# Один event loop на процесс воркера, а не новый на каждый запуск
+_loop = None
 
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    result = loop.run_until_complete(async_parse())
-    loop.close()
 
-    # Кешируем результаты
-    cache.set('last_news_results', {
-        'today': result.get('today', {}),
-        'yesterday': result.get('yesterday', {}),
-        'last_updated': result.get('last_updated')
-    }, timeout=86400)  # Кеш на 24 часа
+def run_async(coro):
+    """Выполнение корутины в долгоживущем event loop процесса"""
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+    return _loop.run_until_complete(coro)
 
-    return result
+
+@shared_task(bind=True, ignore_result=False)
+def parse_kaktus_news_task(self):
+    """
+    Celery задача для планового парсинга новостей всех активных источников.
+
+    Блокировка в Redis (SET NX PX) не дает пересекающимся запускам
+    парсить одно и то же; снимается только владельцем или по таймауту.
+    Без Redis задача не запускается: блокировка в памяти процесса не
+    видна другим воркерам.
+    """
+    client = get_redis()
+    if client is None:
+        raise ImproperlyConfigured('Для планового парсинга нужен REDIS_URL')
+    token = acquire_lock(client, CRAWL_LOCK_KEY, settings.NEWS_CRAWL_LOCK_TIMEOUT)
+    if token is None:
+        return {'status': 'skipped', 'reason': 'locked'}
+    try:
+        report = run_async(crawl_due_sources())
+    finally:
+        release_lock(client, CRAWL_LOCK_KEY, token)
+    return {'status': 'done', 'sources': report}
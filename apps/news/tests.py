@@ -1,3 +1,1224 @@
-from django.test import TestCase
+import asyncio
+import contextvars
+import time
+import zlib
+from datetime import date, datetime, timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+from urllib.parse import urljoin
 
-# Create your tests here.
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from asgiref.sync import async_to_sync, sync_to_async
+from celery.signals import task_prerun
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.users.models import CustomUser
+from core.asgi import application
+from core.db_router import PIN_COOKIE, PrimaryReplicaRouter, ReadYourWritesMiddleware, use_primary
+from core.redis import acquire_lock, release_lock
+from . import dedup, news_cache
+from .archive import archive_batch
+from .crawler import CrawlScheduler, _until_cursor, crawl_date, crawl_source, fetch_details, get_cursor
+from .feeds import RedisFeedStore, feed_member, get_feed_store
+from .filters import NewsFilterBackend
+from .ingestion import clear_source_cache, ingest_news, save_article_details
+from .management.commands.backfill_news import Command as BackfillCommand
+from .models import ArchivedArticle, Article, ArticleBucket, BackfillCheckpoint, Category, CrawlRun, Source
+from .pagination import KeysetPagination
+from .parsers import UNAVAILABLE, KaktusMediaParser, extract_articles_bs4, extract_articles_lxml, get_shared_parser
+from .search import FTS_TABLE, restore_triggers, search_ids
+from .selectors import get_stored_news
+from .stream import STREAM_PATH, news_stream, publish_articles
+from .tasks import CRAWL_LOCK_KEY, parse_kaktus_news_task
+from .views import AsyncAPIView
+
+TESTDATA_DIR = Path(__file__).resolve().parent / 'testdata'
+
+
+async def start_site(handler):
+    """Локальный HTTP-сервер вместо сайта источника"""
+    app = web.Application()
+    app.router.add_get('/{tail:.*}', handler)
+    server = TestServer(app)
+    await server.start_server()
+    return server
+
+
+def site_parser(server, **options):
+    """KaktusMediaParser, который ходит на локальный сервер"""
+    parser_class = type('SiteParser', (KaktusMediaParser,), {'BASE_URL': f'http://{server.host}:{server.port}'})
+    return parser_class(PARSE_EXECUTOR='sync', **options)
+
+
+class ParseEnginesTest(SimpleTestCase):
+    """lxml-движок должен давать тот же результат, что и BeautifulSoup"""
+
+    def test_engines_are_equivalent_on_recorded_pages(self):
+        files = sorted(TESTDATA_DIR.glob('kaktus_listing_*.html'))
+        self.assertTrue(files)
+        for path in files:
+            html = path.read_text(encoding='utf-8')
+            with self.subTest(page=path.name), mock.patch('apps.news.parsers.logger') as logger:
+                expected = extract_articles_bs4(html)
+                self.assertTrue(expected)
+                skipped = logger.warning.call_count
+                self.assertEqual(extract_articles_lxml(html), expected)
+                # Битые статьи оба движка пропускают одинаково
+                self.assertEqual(logger.warning.call_count, 2 * skipped)
+
+    def test_empty_page(self):
+        self.assertEqual(extract_articles_lxml(''), extract_articles_bs4(''))
+
+
+class ListingPagesTest(TestCase):
+    """Конец списка и недоступная страница различаются: backfill не ставит чекпоинт на неполную дату"""
+
+    def setUp(self):
+        clear_source_cache()
+        self.html = (TESTDATA_DIR / 'kaktus_listing_quiet_day.html').read_text(encoding='utf-8')
+
+    def parser(self, *pages):
+        responses = list(pages)
+
+        async def get(url, **kwargs):
+            return responses.pop(0)
+
+        parser = KaktusMediaParser(PARSE_EXECUTOR='sync')
+        parser._get = get
+        return parser
+
+    def crawl(self, *pages):
+        async def scenario():
+            stats = {}
+            articles = [a async for a in self.parser(*pages).iter_articles(datetime(2025, 6, 1), stats=stats)]
+            return articles, stats
+
+        return async_to_sync(scenario)()
+
+    def test_missing_page_ends_listing(self):
+        articles, stats = self.crawl(self.html, None)
+        self.assertEqual((len(articles), stats['pages'], stats['failed']), (25, 1, False))
+
+    def test_server_error_marks_date_failed(self):
+        articles, stats = self.crawl(self.html, UNAVAILABLE)
+        self.assertEqual((len(articles), stats['failed']), (25, True))
+        _, stats = self.crawl(None)
+        self.assertTrue(stats['failed'])
+
+    def test_page_limit_marks_date_truncated(self):
+        parser = self.parser(self.html, self.html.replace('/doc/', '/doc/2'))
+        parser.options['MAX_PAGES'] = 2
+
+        async def scenario():
+            stats = {}
+            articles = [a async for a in parser.iter_articles(datetime(2025, 6, 1), stats=stats)]
+            return articles, stats
+
+        articles, stats = async_to_sync(scenario)()
+        self.assertEqual((len(articles), stats['pages']), (50, 2))
+        self.assertTrue(stats['truncated'])
+        self.assertTrue(stats['failed'])
+
+    def test_backfill_keeps_failed_date_for_next_run(self):
+        command = BackfillCommand()
+        command.batch_size, command.with_details = 100, False
+        day = date(2025, 6, 1)
+        _, _, error = async_to_sync(command.load)(self.parser(self.html, UNAVAILABLE), day)
+        self.assertIsNotNone(error)
+        self.assertEqual(Article.objects.count(), 25)
+        self.assertFalse(BackfillCheckpoint.objects.exists())
+
+        _, stats, error = async_to_sync(command.load)(self.parser(self.html, None), day)
+        self.assertIsNone(error)
+        self.assertEqual(BackfillCheckpoint.objects.get(date=day).articles, 25)
+
+
+class ConditionalGetTest(TestCase):
+    """ETag страницы списка сохраняется только после записи ее статей"""
+
+    def setUp(self):
+        cache.clear()
+        clear_source_cache()
+        self.html = (TESTDATA_DIR / 'kaktus_listing_quiet_day.html').read_text(encoding='utf-8')
+        self.sent_etags = []
+
+    async def handler(self, request):
+        if 'page' in request.query:
+            return web.Response(status=404)
+        self.sent_etags.append(request.headers.get('If-None-Match'))
+        if request.headers.get('If-None-Match') == '"v1"':
+            return web.Response(status=304)
+        return web.Response(text=self.html, content_type='text/html', headers={'ETag': '"v1"'})
+
+    def test_failed_ingest_does_not_hide_page(self):
+        async def scenario():
+            server = await start_site(self.handler)
+            try:
+                async with site_parser(server) as parser:
+                    crawl = lambda: crawl_date(parser, datetime(2025, 6, 1), conditional=True, with_details=False)
+                    with mock.patch('apps.news.crawler.ingest_articles', side_effect=RuntimeError('БД недоступна')):
+                        with self.assertRaises(RuntimeError):
+                            await crawl()
+                    return [await crawl(), await crawl()]
+            finally:
+                await server.close()
+
+        first, second = async_to_sync(scenario)()
+        self.assertEqual(len(first['created']), 25)
+        self.assertTrue(second['not_modified'])
+        self.assertEqual(self.sent_etags, [None, None, '"v1"'])
+
+
+class DetailsFetchTest(TestCase):
+    """Повторы при 5xx, лимит частоты и учет попыток догрузки текста"""
+
+    ARTICLE = '<html><body><div class="BbCode"><p>Текст статьи</p></div></body></html>'
+
+    def setUp(self):
+        clear_source_cache()
+        self.requests = []
+        self.failures = 0  # сколько первых ответов на каждый url - 503
+
+    async def handler(self, request):
+        self.requests.append((request.path, asyncio.get_running_loop().time()))
+        if sum(path == request.path for path, _ in self.requests) <= self.failures:
+            return web.Response(status=503)
+        if request.path.startswith('/empty'):
+            return web.Response(text='<html><body></body></html>', content_type='text/html')
+        return web.Response(text=self.ARTICLE, content_type='text/html')
+
+    def run_parser(self, coroutine, **options):
+        async def scenario():
+            server = await start_site(self.handler)
+            try:
+                async with site_parser(server, RETRY_BACKOFF=0, **options) as parser:
+                    return await coroutine(parser)
+            finally:
+                await server.close()
+
+        return async_to_sync(scenario)()
+
+    def test_server_error_is_retried(self):
+        self.failures = 2
+        detail = self.run_parser(lambda parser: parser.fetch_article_detail(parser.BASE_URL + '/doc/1'), RETRIES=2)
+        self.assertEqual(detail['content'], 'Текст статьи')
+        self.assertEqual(len(self.requests), 3)
+
+    def test_persistent_server_error_is_unavailable(self):
+        self.failures = 10
+        result = self.run_parser(lambda parser: parser._get(parser.BASE_URL + '/doc/1'), RETRIES=2)
+        self.assertIs(result, UNAVAILABLE)
+        self.assertEqual(len(self.requests), 3)
+
+    def test_requests_to_host_are_spaced_by_rate_limit(self):
+        urls = [f'/doc/{n}' for n in range(5)]
+        self.run_parser(
+            lambda parser: parser.fetch_article_details(parser.BASE_URL + url for url in urls),
+            HOST_RATE_LIMIT=20, MAX_CONCURRENCY=5,
+        )
+        times = sorted(at for _, at in self.requests)
+        self.assertEqual(len(times), 5)
+        self.assertGreaterEqual(times[-1] - times[0], 4 / 20 * 0.9)
+
+    def test_failed_pages_are_not_refetched_every_crawl(self):
+        def backdate(**fields):
+            Article.objects.filter(url__endswith='/empty').update(
+                details_checked_at=timezone.now() - timedelta(days=1), **fields,
+            )
+
+        async def crawls(parser):
+            await sync_to_async(ingest_news)({'date': '2025-06-01', 'source': parser.BASE_URL, 'articles': [
+                {'title': f'Новость {name}', 'url': f'/{name}', 'time': '12:00', 'source': 'Сайт'}
+                for name in ('empty', 'doc')
+            ]})
+            urls = [parser.BASE_URL + '/empty', parser.BASE_URL + '/doc']
+            counts = [await fetch_details(parser, urls), await fetch_details(parser, urls)]
+            counts.append(len(self.requests))
+            # После NEWS_DETAILS_RETRY_INTERVAL - повтор, после NEWS_DETAILS_MAX_ATTEMPTS - больше никогда
+            await sync_to_async(backdate)()
+            counts.append(await fetch_details(parser, urls))
+            await sync_to_async(backdate)(details_attempts=settings.NEWS_DETAILS_MAX_ATTEMPTS)
+            counts.append(await fetch_details(parser, urls))
+            return counts
+
+        # Страница без текста не запрашивается на каждом запуске
+        self.assertEqual(self.run_parser(crawls), [2, 0, 2, 1, 0])
+        self.assertEqual(len(self.requests), 3)
+        self.assertEqual(Article.objects.filter(content__isnull=False).count(), 1)
+
+
+class CrawlSchedulerTest(TestCase):
+    """Планировщик подхватывает новые источники и останавливает выключенные"""
+
+    def setUp(self):
+        self.crawled = []
+
+    async def crawl_source(self, source, **kwargs):
+        self.crawled.append((source.name, source.max_concurrency))
+        source.last_crawled_at = timezone.now()
+        return {'source': source.name, 'fetched': 0, 'created': 0, 'duration': 0}
+
+    def test_sources_are_resynced(self):
+        first = Source.objects.create(name='Первый', url='https://kaktus.media/')
+        Source.objects.create(name='Без парсера', url='https://example.com/')
+
+        async def scenario():
+            scheduler = CrawlScheduler(refresh_interval=0.05)
+            runner = asyncio.ensure_future(scheduler.run())
+            await asyncio.sleep(0.1)
+            started = set(scheduler.tasks)
+
+            second = await sync_to_async(Source.objects.create)(name='Второй', url='https://www.kaktus.media/')
+            await sync_to_async(Source.objects.filter(pk=first.pk).update)(is_active=False)
+            await asyncio.sleep(0.1)
+            resynced = set(scheduler.tasks)
+            await sync_to_async(Source.objects.filter(pk=second.pk).update)(max_concurrency=9, crawl_interval=30)
+            await asyncio.sleep(0.1)
+            running = scheduler.sources[second.pk]
+            tasks = list(scheduler.tasks.values())
+
+            runner.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await runner
+            return started, resynced, running, tasks
+
+        with mock.patch('apps.news.crawler.crawl_source', self.crawl_source):
+            started, resynced, running, tasks = async_to_sync(scenario)()
+
+        self.assertEqual(started, {first.pk})
+        self.assertEqual(resynced, {running.pk})
+        self.assertEqual(self.crawled, [('Первый', 4), ('Второй', 4)])
+        # Новые настройки - у уже запущенного источника, без перезапуска и лишнего парсинга
+        self.assertEqual((running.max_concurrency, running.crawl_interval), (9, 30))
+        self.assertTrue(all(task.done() for task in tasks))
+
+
+class FakeRedis:
+    """Минимум Redis для блокировок: SET NX и скрипт снятия блокировки"""
+
+    def __init__(self):
+        self.data = {}
+
+    def set(self, key, value, nx=False, px=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value.encode()
+        return True
+
+    def register_script(self, script):
+        def release(keys, args):
+            if self.data.get(keys[0]) == args[0].encode():
+                del self.data[keys[0]]
+                return 1
+            return 0
+        return release
+
+
+class CrawlLockTest(SimpleTestCase):
+    """Плановый парсинг под блокировкой Redis, снимаемой только владельцем"""
+
+    def test_lock_is_released_only_by_owner(self):
+        client = FakeRedis()
+        token = acquire_lock(client, 'lock', 10)
+        self.assertIsNotNone(token)
+        self.assertIsNone(acquire_lock(client, 'lock', 10))
+        self.assertFalse(release_lock(client, 'lock', 'чужой токен'))
+        self.assertTrue(release_lock(client, 'lock', token))
+        self.assertIsNotNone(acquire_lock(client, 'lock', 10))
+
+    def test_task_skips_while_locked(self):
+        client = FakeRedis()
+        crawl = mock.AsyncMock(return_value=[])
+        with mock.patch('apps.news.tasks.get_redis', return_value=client), \
+                mock.patch('apps.news.tasks.crawl_due_sources', crawl):
+            self.assertEqual(parse_kaktus_news_task.apply().get(), {'status': 'done', 'sources': []})
+            self.assertEqual(client.data, {})
+            acquire_lock(client, CRAWL_LOCK_KEY, 10)
+            self.assertEqual(parse_kaktus_news_task.apply().get()['status'], 'skipped')
+        crawl.assert_awaited_once()
+
+    def test_task_refuses_to_run_without_redis(self):
+        with mock.patch('apps.news.tasks.get_redis', return_value=None), \
+                mock.patch('apps.news.tasks.crawl_due_sources') as crawl:
+            with self.assertRaises(ImproperlyConfigured):
+                parse_kaktus_news_task.apply().get()
+        crawl.assert_not_called()
+
+
+class CrawlCursorTest(TestCase):
+    """Курсор CrawlRun: следующий запуск обрабатывает только статьи новее него"""
+
+    def setUp(self):
+        cache.clear()
+        clear_source_cache()
+        self.html = (TESTDATA_DIR / 'kaktus_listing_quiet_day.html').read_text(encoding='utf-8')
+
+    async def handler(self, request):
+        if 'page' in request.query:
+            return web.Response(status=404)
+        return web.Response(text=self.html, content_type='text/html')
+
+    def test_run_records_cursor_of_newest_article(self):
+        async def scenario():
+            server = await start_site(self.handler)
+            try:
+                parser_class = type(site_parser(server))
+                source = await sync_to_async(Source.objects.create)(name='Сайт', url=parser_class.BASE_URL)
+                with mock.patch('apps.news.crawler.get_parser_class', return_value=parser_class):
+                    first = await crawl_source(source, days=1, with_details=False)
+                    await sync_to_async(cache.clear)()  # без валидаторов страница разбирается заново
+                    second = await crawl_source(source, days=1, with_details=False)
+                return source, first, second
+            finally:
+                await server.close()
+
+        source, first, second = async_to_sync(scenario)()
+        self.assertEqual((first['created'], second['created']), (25, 0))
+        newest = Article.objects.order_by('-published_at', '-id').first()
+        runs = list(CrawlRun.objects.filter(source=source))
+        self.assertEqual([run.status for run in runs], [CrawlRun.STATUS_SUCCESS] * 2)
+        self.assertEqual(runs[-1].inserted, 25)
+        self.assertEqual(get_cursor(source)['published_at'], newest.published_at)
+
+    @override_settings(NEWS_PARSER={'RETRIES': 0})
+    def test_unavailable_page_keeps_cursor_until_refetched(self):
+        page_two = {'html': None}
+
+        async def handler(request):
+            page = request.query.get('page')
+            if page is None:
+                return web.Response(text=self.html, content_type='text/html')
+            if page == '2':
+                if page_two['html'] is None:
+                    return web.Response(status=503)
+                return web.Response(text=page_two['html'], content_type='text/html')
+            return web.Response(status=404)
+
+        async def scenario():
+            server = await start_site(handler)
+            try:
+                parser_class = type(site_parser(server))
+                source = await sync_to_async(Source.objects.create)(name='Сайт', url=parser_class.BASE_URL)
+                with mock.patch('apps.news.crawler.get_parser_class', return_value=parser_class):
+                    first = await crawl_source(source, days=1, with_details=False)
+                    failed_cursor = await sync_to_async(get_cursor)(source)
+                    page_two['html'] = self.html.replace('/doc/', '/doc/2')
+                    second = await crawl_source(source, days=1, with_details=False)
+                return source, first, failed_cursor, second
+            finally:
+                await server.close()
+
+        source, first, failed_cursor, second = async_to_sync(scenario)()
+        runs = list(CrawlRun.objects.filter(source=source).order_by('started_at', 'id'))
+        self.assertEqual([run.status for run in runs], [CrawlRun.STATUS_FAILED, CrawlRun.STATUS_SUCCESS])
+        self.assertIsNone(failed_cursor)
+        self.assertIn('error', first)
+        # Следующий запуск не остановился на сохраненных статьях первой страницы
+        self.assertEqual((first['created'], second['created']), (25, 25))
+        self.assertIsNotNone(get_cursor(source))
+
+    def test_listing_stops_at_cursor(self):
+        items = [{'url': f'/doc/{n}', 'time': f'{n:02d}:00'} for n in (15, 14, 13, 12)]
+
+        async def listing():
+            for item in items:
+                yield item
+
+        async def scenario(cursor):
+            newest = {}
+            passed = [item['url'] async for item in _until_cursor(listing(), '2025-06-01', 'https://site', cursor, newest)]
+            return passed, newest
+
+        published_at = timezone.make_aware(datetime(2025, 6, 1, 13))
+        passed, newest = async_to_sync(scenario)({'published_at': published_at, 'url': 'https://site/doc/13'})
+        self.assertEqual(passed, ['/doc/15', '/doc/14'])
+        self.assertEqual(newest['url'], 'https://site/doc/15')
+        passed, _ = async_to_sync(scenario)(None)
+        self.assertEqual(len(passed), 4)
+
+
+class IngestionTest(TestCase):
+    """Запись страницы парсера - постоянное число запросов независимо от числа статей"""
+
+    def setUp(self):
+        clear_source_cache()
+
+    def items(self, start, count):
+        return [
+            {'title': f'Новость номер {n}', 'url': f'/doc/{n}', 'time': '12:00', 'source': 'Kaktus Media',
+             'categories': ['Экономика', 'Политика']}
+            for n in range(start, start + count)
+        ]
+
+    def ingest(self, items):
+        with CaptureQueriesContext(connection) as queries:
+            ingest_news({'date': '2025-06-01', 'source': 'https://kaktus.media', 'articles': items})
+        return len(queries)
+
+    def test_queries_do_not_grow_with_page_size(self):
+        # 40, а не больше: Django на SQLite делит bulk-запросы по 999 параметров,
+        # а у статьи 8 строк LSH-корзин; на PostgreSQL предела нет
+        self.ingest(self.items(0, 1))  # источник и категории уже созданы
+        created = self.ingest(self.items(100, 10))
+        self.assertEqual(self.ingest(self.items(200, 40)), created)
+        # Повторная запись тех же страниц (только обновление)
+        updated = self.ingest(self.items(100, 10))
+        self.assertEqual(self.ingest(self.items(200, 40)), updated)
+        self.assertEqual(Article.objects.count(), 51)
+        self.assertEqual(Article.categories.through.objects.count(), 102)
+
+    def test_source_is_found_by_domain(self):
+        source = Source.objects.create(name='Kaktus', url='https://www.kaktus.media/')
+        self.ingest(self.items(0, 2))
+        self.assertEqual(Source.objects.count(), 1)
+        self.assertEqual(set(Article.objects.values_list('source_id', flat=True)), {source.pk})
+
+
+@override_settings(NEWS_READ_MODE='db')
+class StoredNewsTest(TestCase):
+    """Режим db: новости за дату из БД в формате ответа парсера, без походов на сайт"""
+
+    def setUp(self):
+        cache.clear()
+        source = Source.objects.create(name='Kaktus Media', url='https://kaktus.media')
+        today = timezone.localtime().replace(hour=12, minute=0, second=0, microsecond=0)
+        for n, published_at in enumerate([today - timedelta(hours=2), today, today - timedelta(days=1)]):
+            Article.objects.create(
+                title=f'Новость {n}', url=f'https://kaktus.media/doc/{n}', source=source, published_at=published_at,
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(CustomUser.objects.create_user('reader@example.com', 'password'))
+
+    def test_today_comes_from_database(self):
+        with mock.patch('apps.news.parsers.KaktusMediaParser.fetch_news', side_effect=AssertionError):
+            response = self.client.get(reverse('today-news'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            'date': timezone.localdate().strftime('%Y-%m-%d'),
+            'articles': [
+                {'title': 'Новость 1', 'url': 'https://kaktus.media/doc/1', 'time': '12:00', 'source': 'Kaktus Media'},
+                {'title': 'Новость 0', 'url': 'https://kaktus.media/doc/0', 'time': '10:00', 'source': 'Kaktus Media'},
+            ],
+            'source': 'https://kaktus.media',
+        })
+
+    def test_other_sources_are_not_mixed_in(self):
+        other = Source.objects.create(name='24.kg', url='https://24.kg')
+        Article.objects.create(title='Чужая', url='https://24.kg/doc/1', source=other, published_at=timezone.now())
+        titles = [article['title'] for article in get_stored_news(datetime.now(), 'https://kaktus.media')['articles']]
+        self.assertNotIn('Чужая', titles)
+        self.assertEqual(len(titles), 2)
+
+    def test_queries_do_not_grow_with_articles(self):
+        day = datetime.combine(timezone.localdate() - timedelta(days=1), datetime.min.time())
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(len(get_stored_news(day)['articles']), 1)
+        self.assertEqual(len(queries), 1)
+
+
+@override_settings(NEWS_READ_MODE='db')
+class KeysetPaginationTest(TestCase):
+    """Курсорная пагинация ленты: только по явному ?cursor=, без пропусков при равном времени"""
+
+    def setUp(self):
+        cache.clear()
+        source = Source.objects.create(name='Kaktus Media', url='https://kaktus.media')
+        noon = timezone.localtime().replace(hour=12, minute=0, second=0, microsecond=0)
+        # Три статьи с одинаковым временем публикации
+        for n, published_at in enumerate([noon, noon, noon, noon - timedelta(hours=1), noon - timedelta(hours=2)]):
+            Article.objects.create(
+                title=f'Новость {n}', url=f'https://kaktus.media/doc/{n}', source=source, published_at=published_at,
+            )
+        self.expected = list(Article.objects.order_by('-published_at', '-id').values_list('url', flat=True))
+        self.client = APIClient()
+        self.client.force_authenticate(CustomUser.objects.create_user('keyset@example.com', 'password'))
+
+    def get(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_default_keeps_page_shape(self):
+        self.assertEqual(set(self.get(reverse('latest-news'))), {'page', 'per_page', 'total', 'articles'})
+
+    def test_walks_ties_without_gaps_and_back(self):
+        pages = [self.get(reverse('latest-news'), cursor='', per_page=2)]
+        self.assertIsNone(pages[0]['previous'])
+        while pages[-1]['next']:
+            pages.append(self.get(pages[-1]['next']))
+        self.assertEqual([[a['url'] for a in page['articles']] for page in pages],
+                         [self.expected[0:2], self.expected[2:4], self.expected[4:]])
+
+        previous = self.get(pages[-1]['previous'])
+        self.assertEqual([a['url'] for a in previous['articles']], self.expected[2:4])
+        self.assertEqual(previous['next'], pages[1]['next'])
+        self.assertEqual(self.get(previous['previous'])['articles'], pages[0]['articles'])
+
+    def test_cursor_round_trip(self):
+        article = Article.objects.order_by('-published_at', '-id')[1]
+        cursor = KeysetPagination.encode_cursor('p', article)
+        request = RequestFactory().get('/', {'cursor': cursor})
+        request.query_params = request.GET
+        self.assertEqual(KeysetPagination().decode_cursor(request), ('p', article.published_at, article.pk))
+
+        response = self.client.get(reverse('latest-news'), {'cursor': 'не-курсор'})
+        self.assertEqual(response.status_code, 404)
+
+
+class NewsFilterTest(TestCase):
+    """Фильтры title/date/source одинаково работают для БД и для ответов парсера"""
+
+    def setUp(self):
+        self.kaktus = Source.objects.create(name='Kaktus Media', url='https://kaktus.media')
+        self.other = Source.objects.create(name='24.kg', url='https://24.kg')
+        day = timezone.make_aware(datetime(2025, 6, 1, 12))
+        for n, (source, published_at) in enumerate([
+            (self.kaktus, day), (self.kaktus, day - timedelta(days=1)), (self.other, day),
+        ]):
+            Article.objects.create(title=f'Новость {n}', url=f'https://site/doc/{n}', source=source,
+                                   published_at=published_at)
+        self.listings = [
+            {'date': '2025-06-01', 'articles': [{'title': 'Новость 0', 'source': 'Kaktus Media'},
+                                                {'title': 'Новость 2', 'source': '24.kg'}]},
+            {'date': '2025-05-31', 'articles': [{'title': 'Новость 1', 'source': 'Kaktus Media'}]},
+        ]
+
+    def titles(self, data, **params):
+        request = Request(RequestFactory().get('/', params))
+        result = NewsFilterBackend().filter_queryset(request, data, None)
+        return sorted(article.title if isinstance(article, Article) else article['title'] for article in result)
+
+    def test_database_and_listings_match(self):
+        cases = [
+            ({'date': '2025-06-01'}, ['Новость 0', 'Новость 2']),
+            ({'date': '2025-5-31'}, ['Новость 1']),
+            ({'source': str(self.kaktus.pk)}, ['Новость 0', 'Новость 1']),
+            ({'source': '24.kg'}, ['Новость 2']),
+            ({'source': '999999'}, []),
+            ({'title': 'Новость 1'}, ['Новость 1']),
+            ({'title': 'нОВОСТЬ 1'}, ['Новость 1']),
+            ({'title': 'НОВОСТЬ'}, ['Новость 0', 'Новость 1', 'Новость 2']),
+            ({'date': '2025-06-01', 'source': str(self.kaktus.pk)}, ['Новость 0']),
+        ]
+        for params, expected in cases:
+            with self.subTest(**params):
+                self.assertEqual(self.titles(Article.objects.all(), **params), expected)
+                self.assertEqual(self.titles(self.listings, **params), expected)
+
+    def test_invalid_date(self):
+        with self.assertRaises(ValidationError):
+            self.titles(self.listings, date='01.06.2025')
+
+    def test_latest_filters_live_listings(self):
+        client = APIClient()
+        client.force_authenticate(CustomUser.objects.create_user('filters@example.com', 'password'))
+        with mock.patch('apps.news.views.LatestNewsView.get_news', side_effect=self.listings):
+            response = client.get(reverse('latest-news'), {'source': self.kaktus.pk, 'date': '2025-05-31'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([a['title'] for a in response.json()['articles']], ['Новость 1'])
+
+
+class SearchIndexTest(TestCase):
+    """Поисковый индекс следует за статьями при любом способе записи"""
+
+    def setUp(self):
+        clear_source_cache()
+        ingest_news({'date': '2025-06-01', 'source': 'https://kaktus.media', 'articles': [
+            {'title': 'Бюджет республики принят', 'url': '/doc/1', 'time': '12:00', 'source': 'Kaktus Media'},
+            {'title': 'Заседание парламента', 'url': '/doc/2', 'time': '11:00', 'source': 'Kaktus Media'},
+        ]})
+        self.budget, self.session = (Article.objects.get(url__endswith=f'/doc/{n}') for n in (1, 2))
+        save_article_details({self.session.url: {'content': 'Депутаты обсудили бюджет на следующий год'}})
+
+    def found(self, query):
+        return search_ids(query)[0]
+
+    def test_ingested_articles_are_ranked_by_title_first(self):
+        self.assertEqual(self.found('бюджета'), [self.budget.pk, self.session.pk])
+        self.assertEqual(self.found('парламент'), [self.session.pk])
+
+    def test_queryset_update_is_indexed(self):
+        Article.objects.filter(pk=self.session.pk).update(title='Паводок в Оше')
+        self.assertEqual(self.found('паводок'), [self.session.pk])
+        self.assertEqual(self.found('парламента'), [])
+        # Текст статьи при смене заголовка остается в индексе
+        self.assertEqual(self.found('депутаты'), [self.session.pk])
+
+        Article.objects.filter(pk=self.budget.pk).update(content_legacy='Исторический текст про налоги')
+        self.assertEqual(self.found('налоги'), [self.budget.pk])
+
+    def test_deleted_articles_leave_index(self):
+        self.budget.delete()
+        Article.objects.filter(pk=self.session.pk).delete()
+        self.assertEqual(self.found('бюджет'), [])
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT count(*) FROM {FTS_TABLE}')
+            self.assertEqual(cursor.fetchone()[0], 0)
+
+    def test_triggers_are_restored_after_table_rebuild(self):
+        self.assertEqual(restore_triggers(), [])
+        # Так их теряет SQLite при AlterField/RemoveField для news_article
+        with connection.cursor() as cursor:
+            cursor.execute('DROP TRIGGER news_article_fts_title')
+        with mock.patch('apps.news.search.logger') as logger:
+            call_command('migrate', 'news', verbosity=0)
+        logger.warning.assert_called_once()
+        Article.objects.filter(pk=self.session.pk).update(title='Паводок в Оше')
+        self.assertEqual(self.found('паводок'), [self.session.pk])
+
+    def test_admin_search_uses_index(self):
+        self.client.force_login(CustomUser.objects.create_superuser('search-admin@example.com', 'password'))
+        response = self.client.get(reverse('admin:news_article_changelist'), {'q': 'бюджет'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({article.pk for article in response.context['cl'].result_list},
+                         {self.budget.pk, self.session.pk})
+
+
+class DedupTest(TestCase):
+    """Почти-дубликаты: MinHash, LSH-полосы, кластеры и collapse=1"""
+
+    CONTENT = ' '.join(f'слово{n}' for n in range(40))
+
+    def setUp(self):
+        cache.clear()
+        clear_source_cache()
+
+    def ingest(self, source, *titles):
+        start = Article.objects.count()
+        ingest_news({'date': '2025-06-01', 'source': f'https://{source}', 'articles': [
+            {'title': title, 'url': f'/doc/{start + n}', 'time': '12:00', 'source': source}
+            for n, title in enumerate(titles)
+        ]})
+        return [Article.objects.get(url=f'https://{source}/doc/{start + n}') for n in range(len(titles))]
+
+    def test_features_and_bands(self):
+        self.assertEqual(dedup.features('Выборы в Бишкеке, выборы!'), {'выборы', 'бишкек'})
+        signature = dedup.minhash('Выборы в Бишкеке')
+        self.assertEqual(signature, dedup.minhash('выборы   в бишкеке'))
+        self.assertEqual(dedup.unpack(dedup.pack(signature)), signature)
+        self.assertEqual(len(dedup.bands(signature)), dedup.BANDS)
+        other = dedup.minhash('Курс доллара вырос')
+        self.assertLess(dedup.similarity(signature, other), settings.NEWS_DEDUP_MIN_SIMILARITY)
+        self.assertFalse(set(dedup.bands(signature)) & set(dedup.bands(other)))
+
+    def test_near_duplicates_share_cluster(self):
+        first, other = self.ingest('kaktus.media', 'В Бишкеке прошли выборы мэра города', 'Курс доллара вырос')
+        copy, = self.ingest('24.kg', 'В Бишкеке прошли выборы мэра города!')
+        self.assertEqual(first.cluster_id, first.pk)
+        self.assertEqual(copy.cluster_id, first.pk)
+        self.assertEqual(other.cluster_id, other.pk)
+
+        client = APIClient()
+        client.force_authenticate(CustomUser.objects.create_user('dedup@example.com', 'password'))
+        with override_settings(NEWS_READ_MODE='db'):
+            response = client.get(reverse('latest-news'), {'cursor': '', 'collapse': '1'})
+        self.assertEqual(sorted(a['url'] for a in response.json()['articles']), sorted([first.url, other.url]))
+
+    def test_collapse_applies_to_today_and_page_mode(self):
+        today = timezone.localdate().strftime('%Y-%m-%d')
+        ingest_news({'date': today, 'source': 'https://kaktus.media', 'articles': [
+            {'title': 'В Бишкеке прошли выборы мэра города', 'url': '/doc/1', 'time': '12:00', 'source': 'Kaktus'},
+            {'title': 'В Бишкеке прошли выборы мэра города!', 'url': '/doc/2', 'time': '11:00', 'source': 'Kaktus'},
+            {'title': 'Курс доллара вырос', 'url': '/doc/3', 'time': '10:00', 'source': 'Kaktus'},
+        ]})
+        expected = ['https://kaktus.media/doc/1', 'https://kaktus.media/doc/3']
+        client = APIClient()
+        client.force_authenticate(CustomUser.objects.create_user('dedup@example.com', 'password'))
+
+        async def fetch_news(parser, date):
+            # Ответ парсера: относительные url, статьи только за сегодня
+            articles = [{'title': '', 'url': f'/doc/{n}', 'time': '12:00', 'source': 'Kaktus'} for n in (1, 2, 3)]
+            day = date.strftime('%Y-%m-%d')
+            return {'date': day, 'source': 'https://kaktus.media', 'articles': articles if day == today else []}
+
+        for mode in ('db', 'live'):
+            cache.clear()
+            with self.subTest(mode=mode), override_settings(NEWS_READ_MODE=mode), \
+                    mock.patch('apps.news.parsers.KaktusMediaParser.fetch_news', fetch_news):
+                today_news = client.get(reverse('today-news'), {'collapse': '1'}).json()
+                latest = client.get(reverse('latest-news'), {'collapse': '1'}).json()
+                self.assertEqual([urljoin(today_news['source'], a['url']) for a in today_news['articles']], expected)
+                self.assertEqual([urljoin('https://kaktus.media', a['url']) for a in latest['articles']], expected)
+
+    def test_clusters_are_refreshed_when_text_arrives(self):
+        head, = self.ingest('kaktus.media', 'Итоги недели')
+        moved, member = self.ingest('24.kg', 'Главное за день в столице', 'Главное за день в столице!')
+        self.assertEqual(member.cluster_id, moved.pk)
+
+        # С одинаковым текстом статьи с разными заголовками - один сюжет
+        save_article_details({head.url: {'content': self.CONTENT}, moved.url: {'content': self.CONTENT}})
+        clusters = dict(Article.objects.values_list('id', 'cluster_id'))
+        self.assertEqual(clusters, {head.pk: head.pk, moved.pk: head.pk, member.pk: head.pk})
+        self.assertEqual(ArticleBucket.objects.filter(article=moved).count(), dedup.BANDS)
+
+
+class CompressedContentTest(TestCase):
+    """Текст статьи хранится сжатым и не читается без обращения к нему"""
+
+    def setUp(self):
+        clear_source_cache()
+        self.source = Source.objects.create(name='Kaktus Media', url='https://kaktus.media')
+
+    def create(self, n, **fields):
+        return Article.objects.create(title=f'Новость {n}', url=f'https://kaktus.media/doc/{n}', source=self.source,
+                                      published_at=timezone.make_aware(datetime(2025, 6, 1, 12)), **fields)
+
+    def test_round_trip(self):
+        text = 'Текст статьи. ' * 100
+        article = self.create(1, content=text)
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT content FROM news_article WHERE id = %s', [article.pk])
+            raw = bytes(cursor.fetchone()[0])
+        self.assertLess(len(raw), len(text.encode()))
+        self.assertEqual(zlib.decompress(raw).decode(), text)
+
+        loaded = Article.objects.get(pk=article.pk)
+        self.assertEqual(loaded.get_deferred_fields(), {'content', 'content_legacy'})
+        self.assertEqual(loaded.content, text)
+        self.assertIsNone(self.create(2).content)
+
+    def test_command_moves_legacy_text(self):
+        articles = [self.create(n) for n in range(3)]
+        Article.objects.filter(pk__in=[a.pk for a in articles[:2]]).update(content_legacy='Старый несжатый текст')
+        out = StringIO()
+        call_command('compress_article_content', batch_size=1, stdout=out)
+        self.assertIn('статей 2', out.getvalue())
+        self.assertEqual(
+            list(Article.objects.order_by('pk').values_list('content', 'content_legacy')),
+            [('Старый несжатый текст', '')] * 2 + [(None, '')],
+        )
+        self.assertEqual(search_ids('несжатый')[0], sorted(a.pk for a in articles[:2]))
+
+    def test_reingest_keeps_legacy_text_searchable(self):
+        article = self.create(1)
+        Article.objects.filter(pk=article.pk).update(content_legacy='Старый несжатый текст')
+        ingest_news({'date': '2025-06-01', 'source': 'https://kaktus.media', 'articles': [
+            {'title': 'Новость 1', 'url': '/doc/1', 'time': '12:00', 'source': 'Kaktus Media'},
+        ]})
+        self.assertEqual(search_ids('несжатый')[0], [article.pk])
+
+
+class ArchiveTest(TestCase):
+    """Перенос в архив: постоянное число запросов на пачку, кластеры получают новую первую статью"""
+
+    def setUp(self):
+        clear_source_cache()
+        self.cutoff = timezone.make_aware(datetime(2024, 6, 1))
+
+    def ingest(self, date_str, items):
+        ingest_news({'date': date_str, 'source': 'https://kaktus.media', 'articles': [
+            {'title': title, 'url': url, 'time': '12:00', 'source': 'Kaktus Media', 'categories': ['Экономика']}
+            for title, url in items
+        ]})
+
+    def test_queries_do_not_grow_with_batch(self):
+        # Каждая старая статья - первая в кластере из трех, две копии остаются
+        titles = [f'x{n:03d}a x{n:03d}b x{n:03d}c' for n in range(60)]
+        self.ingest('2024-01-01', [(title, f'/old/{n}') for n, title in enumerate(titles)])
+        self.ingest('2025-01-01', [(title + '!', f'/copy/{n}/{k}') for n, title in enumerate(titles) for k in range(2)])
+
+        head = Article.objects.get(url__endswith='/old/0')
+        self.assertEqual(set(Article.objects.filter(url__contains='/copy/0/').values_list('cluster_id', flat=True)),
+                         {head.pk})
+
+        with CaptureQueriesContext(connection) as small:
+            self.assertEqual(archive_batch(self.cutoff, batch_size=10), 10)
+        with CaptureQueriesContext(connection) as large:
+            self.assertEqual(archive_batch(self.cutoff, batch_size=50), 50)
+        self.assertEqual(len(large), len(small))
+
+        self.assertEqual(ArchivedArticle.objects.count(), 60)
+        self.assertFalse(Article.objects.filter(url__contains='/old/').exists())
+        self.assertFalse(ArticleBucket.objects.filter(article__isnull=True).exists())
+        for n in (0, 59):
+            copies = Article.objects.filter(url__contains=f'/copy/{n}/').order_by('id')
+            self.assertEqual({article.cluster_id for article in copies}, {copies[0].pk})
+
+
+class ArticleAdminTest(TestCase):
+    """Число запросов страницы админки не должно расти вместе с таблицей"""
+
+    def setUp(self):
+        self.client.force_login(CustomUser.objects.create_superuser('admin@example.com', 'password'))
+        self.source = Source.objects.create(name='Kaktus Media', url='https://kaktus.media')
+        self.categories = [Category.objects.create(name=f'Категория {i}', slug=f'cat-{i}') for i in range(3)]
+        self.created = 0
+
+    def create_articles(self, count):
+        published = timezone.make_aware(datetime(2025, 6, 1, 12))
+        for _ in range(count):
+            self.created += 1
+            article = Article.objects.create(
+                title=f'Новость {self.created}', content='Текст', url=f'https://kaktus.media/doc/{self.created}',
+                source=self.source, published_at=published - timedelta(hours=self.created),
+            )
+            article.categories.set(self.categories)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelist_queries_are_bounded(self):
+        url = reverse('admin:news_article_changelist')
+        for params in ('', '?published=2025', '?published=2025-05', '?source_name=kaktus', '?category=Категория'):
+            with self.subTest(params=params):
+                self.create_articles(5)
+                small = self.count_queries(url + params)
+                self.create_articles(50)
+                self.assertEqual(self.count_queries(url + params), small)
+                self.assertLessEqual(small, 15)
+
+    def test_sidebar_does_not_list_categories(self):
+        Category.objects.bulk_create([Category(name=f'Рубрика {i}', slug=f'extra-{i}') for i in range(30)])
+        self.create_articles(3)
+        url = reverse('admin:news_article_changelist')
+        response = self.client.get(url, {'published': '2025', 'category': 'Категория 1'})
+        self.assertNotContains(response, 'Рубрика 0')
+        self.assertContains(response, '<input type="hidden" name="published" value="2025">', html=True)
+        self.assertEqual(response.context['cl'].result_count, 3)
+
+        response = self.client.get(url, {'category': 'Рубрика'})
+        self.assertEqual(response.context['cl'].result_count, 0)
+
+    def test_drill_down_filters_by_range(self):
+        self.create_articles(30)
+        response = self.client.get(reverse('admin:news_article_changelist') + '?published=2025-05-31')
+        self.assertEqual(response.context['cl'].result_count, 18)
+
+
+@override_settings(
+    DATABASES={**settings.DATABASES, 'replica': {**settings.DATABASES['default'], 'TEST': {'MIRROR': 'default'}}},
+    DATABASE_REPLICA_APPS=['news'],
+)
+class PrimaryReplicaRouterTest(SimpleTestCase):
+    """Чтения новостей - с реплики, пока запрос ничего не записал"""
+
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+
+    def test_news_reads_go_to_replica(self):
+        def view(request):
+            reads = [self.router.db_for_read(Article), self.router.db_for_read(CustomUser)]
+            self.router.db_for_write(Article)
+            reads.append(self.router.db_for_read(Article))
+            return HttpResponse(','.join(reads))
+
+        response = ReadYourWritesMiddleware(view)(RequestFactory().get('/'))
+        self.assertEqual(response.content, b'replica,default,default')
+        with use_primary():
+            self.assertEqual(self.router.db_for_read(Source), 'default')
+
+    def test_write_pins_following_requests(self):
+        def view(request):
+            if request.method == 'POST':
+                self.router.db_for_write(Article)
+            return HttpResponse(self.router.db_for_read(Article))
+
+        middleware = ReadYourWritesMiddleware(view)
+        factory = RequestFactory()
+        self.assertEqual(middleware(factory.get('/')).content, b'replica')
+        response = middleware(factory.post('/'))
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+        pinned = factory.get('/')
+        pinned.COOKIES[PIN_COOKIE] = '1'
+        self.assertEqual(middleware(pinned).content, b'default')
+
+    def test_celery_task_starts_unpinned(self):
+        def worker():
+            self.router.db_for_write(Article)
+            reads = [self.router.db_for_read(Article)]
+            task_prerun.send(sender=None, task_id='next', task=None, args=(), kwargs={})
+            reads.append(self.router.db_for_read(Article))
+            return reads
+
+        self.assertEqual(contextvars.copy_context().run(worker), ['default', 'replica'])
+
+
+class FeedTest(TestCase):
+    """Новые статьи попадают в ленты подписчиков, лента листается курсором"""
+
+    def setUp(self):
+        get_feed_store().clear()
+        clear_source_cache()
+        self.user = CustomUser.objects.create_user('reader@example.com', 'password')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def ingest(self, items):
+        with self.captureOnCommitCallbacks(execute=True):
+            ingest_news({'date': '2025-06-01', 'source': 'https://kaktus.media', 'articles': items})
+
+    def test_fan_out_and_pagination(self):
+        self.ingest([{'title': 'Старая', 'url': '/doc/0', 'time': '09:00', 'source': 'Kaktus', 'categories': ['Спорт']}])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.subscribed_categories.set(Category.objects.filter(name='Спорт'))
+        self.ingest([
+            {'title': f'Спорт {i}', 'url': f'/doc/{i}', 'time': f'1{i}:00', 'source': 'Kaktus', 'categories': ['Спорт']}
+            for i in range(1, 4)
+        ] + [{'title': 'Экономика', 'url': '/doc/9', 'time': '12:00', 'source': 'Kaktus', 'categories': ['Экономика']}])
+
+        titles, url = [], reverse('news-feed') + '?per_page=3'
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url).json()
+            self.assertEqual(len(queries), 1)
+            titles += [article['title'] for article in response['articles']]
+            url = response['next']
+        self.assertEqual(titles, ['Спорт 3', 'Спорт 2', 'Спорт 1', 'Старая'])
+
+    def test_articles_of_same_second_are_not_skipped(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.subscribed_sources.set([Source.objects.create(name='Kaktus', url='https://kaktus.media')])
+        self.ingest([
+            {'title': f'Новость {i}', 'url': f'/doc/{i}', 'time': '10:00', 'source': 'Kaktus', 'categories': []}
+            for i in range(5)
+        ])
+
+        urls, url = [], reverse('news-feed') + '?per_page=2'
+        while url:
+            response = self.client.get(url).json()
+            urls += [article['url'] for article in response['articles']]
+            url = response['next']
+        self.assertEqual(urls, list(Article.objects.order_by('-id').values_list('url', flat=True)))
+
+    def test_redis_page_splits_ties_by_id(self):
+        client = mock.Mock()
+        client.pipeline.return_value.execute.return_value = [
+            [(feed_member(7), 100.0), (feed_member(5), 100.0), (feed_member(3), 100.0)],
+            [(feed_member(9), 90.0)],
+        ]
+        rows = RedisFeedStore(client).page(self.user.pk, (100, 5), 2)
+        self.assertEqual(rows, [(3, 100), (9, 90)])
+
+    def test_subscriptions_put_rebuilds_feed_once(self):
+        source = Source.objects.create(name='Kaktus', url='https://kaktus.media')
+        category = Category.objects.create(name='Спорт')
+        with mock.patch('apps.news.signals.rebuild_feed') as rebuild, self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put(
+                reverse('subscriptions'),
+                {'subscribed_sources': [source.pk], 'subscribed_categories': [category.pk]},
+                format='json',
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(rebuild.call_count, 1)
+
+
+@override_settings(REDIS_URL='', NEWS_STREAM_POLL_INTERVAL=0.02)
+class NewsStreamTest(TestCase):
+    """SSE: догрузка после Last-Event-ID из БД, затем новые статьи из брокера"""
+
+    def setUp(self):
+        self.token = str(AccessToken.for_user(CustomUser.objects.create_user('sse@example.com', 'password')))
+        self.source = Source.objects.create(name='Kaktus', url='https://kaktus.media')
+
+    def create_article(self, n):
+        return Article.objects.create(
+            title=f'Новость {n}', url=f'https://kaktus.media/doc/{n}', source=self.source,
+            published_at=timezone.now(),
+        )
+
+    def scope(self, query=''):
+        return {'type': 'http', 'method': 'GET', 'path': STREAM_PATH, 'headers': [], 'query_string': query.encode()}
+
+    def run_stream(self, scope, until_events, action=None):
+        async def scenario():
+            sent, stop = [], asyncio.Event()
+
+            async def receive():
+                await stop.wait()
+                return {'type': 'http.disconnect'}
+
+            async def send(message):
+                sent.append(message)
+
+            task = asyncio.ensure_future(news_stream(scope, receive, send))
+            events = lambda: [m for m in sent if m.get('body', b'').startswith(b'id: ')]
+            for step in range(200):
+                if action and step == 10:
+                    await sync_to_async(action)()
+                if len(events()) >= until_events or task.done():
+                    break
+                await asyncio.sleep(0.01)
+            stop.set()
+            await task
+            return sent, [int(m['body'].split(b'\n')[0][4:]) for m in events()]
+
+        return async_to_sync(scenario)()
+
+    def test_resume_then_live(self):
+        first, second = self.create_article(1), self.create_article(2)
+        published = []
+
+        def publish():
+            published.append(self.create_article(3).pk)
+            publish_articles(published)
+
+        sent, ids = self.run_stream(self.scope(f'token={self.token}&last_event_id={first.pk}'), 2, publish)
+        self.assertEqual(sent[0]['status'], 200)
+        self.assertEqual(ids, [second.pk] + published)
+
+    def test_articles_from_other_processes_arrive_without_redis(self):
+        # Статью пишет задача Celery в другом процессе: в этот процесс publish_articles не попадает
+        created = []
+        sent, ids = self.run_stream(
+            self.scope(f'token={self.token}'), 1, lambda: created.append(self.create_article(1).pk),
+        )
+        self.assertEqual(ids, created)
+
+    def test_requires_token(self):
+        sent, _ = self.run_stream(self.scope('token=bad'), 0)
+        self.assertEqual(sent[0]['status'], 401)
+
+
+class EchoView(AsyncAPIView):
+    throttle_classes = []
+
+    async def get(self, request):
+        await asyncio.sleep(0)
+        return Response({'email': request.user.email})
+
+    def post(self, request):
+        raise ValidationError({'title': 'Обязательное поле'})
+
+
+class AsyncAPIViewTest(TestCase):
+    """Async dispatch проходит тот же путь DRF, что и синхронный"""
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user('async-view@example.com', 'password')
+        self.factory = APIRequestFactory()
+        self.view = EchoView.as_view()
+
+    def call(self, method, authorized=True):
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(self.user)}'} if authorized else {}
+        return async_to_sync(self.view)(getattr(self.factory, method)('/echo/', **headers))
+
+    def test_async_handler_is_awaited(self):
+        response = self.call('get')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'email': self.user.email})
+
+    def test_authentication_runs_before_handler(self):
+        self.assertEqual(self.call('get', authorized=False).status_code, 401)
+
+    def test_handler_exception_is_handled(self):
+        response = self.call('post')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {'title': 'Обязательное поле'})
+
+    def test_unknown_method(self):
+        self.assertEqual(self.call('delete').status_code, 405)
+
+
+class SharedParserTest(SimpleTestCase):
+    """Один общий парсер на event loop, закрытие - по lifespan.shutdown"""
+
+    def test_concurrent_first_requests_open_one_session(self):
+        opened = []
+
+        class Parser(KaktusMediaParser):
+            async def open(self):
+                if self.session is None:
+                    opened.append(self)
+                    await asyncio.sleep(0.01)
+                return await super().open()
+
+        async def scenario():
+            parsers = await asyncio.gather(*(get_shared_parser(Parser) for _ in range(5)))
+            messages = iter([{'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}])
+            sent = []
+
+            async def receive():
+                return next(messages)
+
+            async def send(message):
+                sent.append(message['type'])
+
+            await application({'type': 'lifespan'}, receive, send)
+            return parsers, sent
+
+        parsers, sent = async_to_sync(scenario)()
+        self.assertEqual(len(opened), 1)
+        self.assertEqual({id(parser) for parser in parsers}, {id(opened[0])})
+        self.assertIsNone(opened[0].session)
+        self.assertEqual(sent, ['lifespan.startup.complete', 'lifespan.shutdown.complete'])
+
+
+class NewsCacheTest(SimpleTestCase):
+    """Кеш новостей: одна загрузка на промах, устаревшие данные обновляются в фоне"""
+
+    day = date(2025, 6, 1)
+
+    def setUp(self):
+        cache.clear()
+        self.loads = 0
+
+    async def loader(self):
+        self.loads += 1
+        await asyncio.sleep(0.05)
+        return {'date': '2025-06-01', 'articles': [self.loads], 'source': 'https://site'}
+
+    def test_concurrent_misses_load_once(self):
+        async def scenario():
+            return await asyncio.gather(*(news_cache.get_or_load('https://site', self.day, self.loader) for _ in range(5)))
+
+        results = async_to_sync(scenario)()
+        self.assertEqual(self.loads, 1)
+        self.assertEqual({status for _, status in results}, {news_cache.MISS})
+        self.assertTrue(all(data['articles'] == [1] for data, _ in results))
+
+    def test_waits_for_lock_owner_instead_of_loading(self):
+        key = news_cache.news_cache_key('https://site', self.day)
+
+        async def other_worker(token):
+            await asyncio.sleep(0.2)
+            await cache.aset(key, {'data': {'articles': ['чужая загрузка']}, 'fresh_until': time.time() + 60})
+            await news_cache._release(key + ':lock', token)
+
+        async def scenario():
+            token = await news_cache._acquire(key + ':lock')
+            owner = asyncio.ensure_future(other_worker(token))
+            result = await news_cache.get_or_load('https://site', self.day, self.loader)
+            await owner
+            return result
+
+        data, status = async_to_sync(scenario)()
+        self.assertEqual((data['articles'], status), (['чужая загрузка'], news_cache.MISS))
+        self.assertEqual(self.loads, 0)
+
+    @override_settings(NEWS_CACHE_FRESH_TTL=0, NEWS_CACHE_PAST_TTL=0)
+    def test_stale_data_is_served_while_refreshing(self):
+        async def scenario():
+            get = lambda: news_cache.get_or_load('https://site', self.day, self.loader)
+            results = [await get()]
+            results += await asyncio.gather(get(), get())  # обновление в фоне - одно
+            await asyncio.gather(*news_cache._background)
+            results.append(await get())
+            await asyncio.gather(*news_cache._background)
+            return results
+
+        results = async_to_sync(scenario)()
+        self.assertEqual(
+            [(data['articles'], status) for data, status in results],
+            [([1], news_cache.MISS), ([1], news_cache.STALE), ([1], news_cache.STALE), ([2], news_cache.STALE)],
+        )
+        self.assertEqual(self.loads, 3)
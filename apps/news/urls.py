@@ -1,7 +1,10 @@
 from django.urls import path
-from .views import TodayNewsView, LatestNewsView
+from .views import TodayNewsView, LatestNewsView, SearchNewsView, ArchiveNewsView, FeedView
 
 urlpatterns = [
     path('today/', TodayNewsView.as_view(), name='today-news'),
     path('latest/', LatestNewsView.as_view(), name='latest-news'),
+    path('search/', SearchNewsView.as_view(), name='search-news'),
+    path('archive/', ArchiveNewsView.as_view(), name='archive-news'),
+    path('feed/', FeedView.as_view(), name='news-feed'),
 ]
\ No newline at end of file
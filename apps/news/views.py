@@ -2,28 +2,116 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
-from .parsers import KaktusMediaParser
+from rest_framework.exceptions import NotFound
+from rest_framework.utils.urls import replace_query_param
+from asgiref.sync import sync_to_async
+from contextlib import asynccontextmanager
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from core.throttling import UserOrIPThrottle
+from .feeds import get_feed_store
+from .filters import NewsFilterBackend, is_collapse_requested
+from .pagination import KeysetPagination
+from .news_cache import HIT, MISS, STALE, get_or_load
+from .parsers import get_parser_class, get_shared_parser
+from .search import search_ids
+from .selectors import (
+    collapse_duplicates, get_archived_news, get_articles_by_ids, get_feed_queryset, get_stored_news, serialize_article,
+)
 from datetime import datetime, timedelta
 import asyncio
 
 
-class NewsBaseView(APIView):
+class AsyncAPIView(APIView):
+    """
+    APIView с async-обработчиками.
+
+    Аутентификация, права и троттлинг (могут ходить в БД) выполняются
+    через sync_to_async, сам обработчик - в event loop сервера.
+    """
+    view_is_async = True
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            response = handler(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+
+class NewsBaseView(AsyncAPIView):
     permission_classes = [IsAuthenticated]
-    parser_class = KaktusMediaParser
+    throttle_classes = [UserOrIPThrottle]
+    throttle_scope = 'news'
+    source_url = 'https://kaktus.media'
+
+    def get_parser_class(self):
+        return get_parser_class(self.source_url)
+
+    @asynccontextmanager
+    async def parser_session(self):
+        """Под ASGI - общий парсер процесса, иначе - свой на запрос"""
+        if isinstance(self.request._request, ASGIRequest):
+            yield await get_shared_parser(self.get_parser_class())
+        else:
+            async with self.get_parser_class()() as parser:
+                yield parser
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.cache_statuses = []
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        statuses = getattr(self, 'cache_statuses', None)
+        if statuses:
+            # Худший статус из всех дат ответа
+            response['X-Cache'] = next(s for s in (MISS, STALE, HIT) if s in statuses)
+        return response
 
     async def get_news(self, date):
-        async with self.parser_class() as parser:
+        """Новости за дату через кеш stale-while-revalidate"""
+        data, cache_status = await get_or_load(
+            self.source_url, date, lambda: self.load_news(date),
+            background=isinstance(self.request._request, ASGIRequest),
+        )
+        self.cache_statuses.append(cache_status)
+        return data
+
+    async def load_news(self, date):
+        if settings.NEWS_READ_MODE == 'db':
+            return await sync_to_async(get_stored_news)(date, self.source_url)
+        async with self.parser_session() as parser:
             return await parser.fetch_news(date)
 
 
 class TodayNewsView(NewsBaseView):
     """Новости за сегодня"""
 
-    def get(self, request):
+    async def get(self, request):
         try:
-            loop = asyncio.new_event_loop()
-            news_data = loop.run_until_complete(self.get_news(datetime.now()))
-            loop.close()
+            news_data = await self.get_news(datetime.now())
+            if is_collapse_requested(request):
+                # Копия: news_data - общий объект из кеша
+                articles = await sync_to_async(collapse_duplicates)(news_data['articles'], self.source_url)
+                news_data = {**news_data, 'articles': articles}
             return Response(news_data)
         except Exception as e:
             return Response(
@@ -33,21 +121,35 @@ class TodayNewsView(NewsBaseView):
 
 
 class LatestNewsView(NewsBaseView):
-    """Последние новости с пагинацией"""
+    """
+    Последние новости с пагинацией.
 
-    def get(self, request):
+    По умолчанию - ?page=N: новости за сегодня и вчера. В режиме db
+    явный ?cursor= (пустой - первая страница) включает курсорную
+    пагинацию по всей ленте; next/previous содержат следующий курсор.
+    """
+    pagination_class = KeysetPagination
+    filter_backends = [NewsFilterBackend]
+
+    def filter_queryset(self, queryset):
+        for backend in self.filter_backends:
+            queryset = backend().filter_queryset(self.request, queryset, self)
+        return queryset
+
+    async def get(self, request):
+        if settings.NEWS_READ_MODE == 'db' and KeysetPagination.cursor_query_param in request.query_params:
+            return await sync_to_async(self.get_keyset_page)(request)
         try:
             page = int(request.query_params.get('page', 1))
             per_page = int(request.query_params.get('per_page', 10))
 
-            loop = asyncio.new_event_loop()
-            today = loop.run_until_complete(self.get_news(datetime.now()))
-            yesterday = loop.run_until_complete(
-                self.get_news(datetime.now() - timedelta(days=1))
+            now = datetime.now()
+            today, yesterday = await asyncio.gather(
+                self.get_news(now),
+                self.get_news(now - timedelta(days=1)),
             )
-            loop.close()
 
-            all_articles = today['articles'] + yesterday['articles']
+            all_articles = await sync_to_async(self.filter_queryset)([today, yesterday])
             start = (page - 1) * per_page
             paginated = all_articles[start:start + per_page]
 
@@ -61,4 +163,95 @@ class LatestNewsView(NewsBaseView):
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_400_BAD_REQUEST
-            )
\ No newline at end of file
+            )
+
+    def get_keyset_page(self, request):
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(self.filter_queryset(get_feed_queryset()), request, view=self)
+        return paginator.get_paginated_response([serialize_article(article) for article in page])
+
+
+class SearchNewsView(APIView):
+    """Полнотекстовый поиск по заголовку и тексту статей, по релевантности"""
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [UserOrIPThrottle]
+    throttle_scope = 'news'
+    max_per_page = 100
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        try:
+            page = max(1, int(request.query_params.get('page', 1)))
+            per_page = min(max(1, int(request.query_params.get('per_page', 10))), self.max_per_page)
+        except ValueError:
+            return Response({'error': 'page и per_page должны быть числами'}, status=status.HTTP_400_BAD_REQUEST)
+        if not query:
+            return Response({'error': 'Пустой запрос'}, status=status.HTTP_400_BAD_REQUEST)
+
+        ids, total = search_ids(query, limit=per_page, offset=(page - 1) * per_page)
+        return Response({
+            'query': query,
+            'page': page,
+            'per_page': per_page,
+            'total': total,
+            'articles': [serialize_article(article) for article in get_articles_by_ids(ids)],
+        })
+
+
+
+class ArchiveNewsView(APIView):
+    """Новости за дату старше срока хранения (?date=YYYY-MM-DD), из архива"""
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [UserOrIPThrottle]
+    throttle_scope = 'news'
+
+    def get(self, request):
+        try:
+            date = datetime.strptime(request.query_params.get('date', ''), '%Y-%m-%d')
+        except ValueError:
+            return Response({'error': 'date должна быть в формате YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(get_archived_news(date, NewsBaseView.source_url))
+
+
+
+class FeedView(APIView):
+    """
+    Персональная лента по подпискам на источники и категории.
+
+    Страница - один ZREVRANGEBYSCORE по sorted set пользователя
+    (заполняется при сборе статей), статьи - одним запросом по id.
+    Курсор - "score:id" последней статьи страницы: у статей одной
+    секунды score общий.
+    """
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [UserOrIPThrottle]
+    throttle_scope = 'news'
+    max_per_page = 100
+
+    def get(self, request):
+        try:
+            per_page = min(max(1, int(request.query_params.get('per_page', 10))), self.max_per_page)
+        except ValueError:
+            return Response({'error': 'per_page должна быть числом'}, status=status.HTTP_400_BAD_REQUEST)
+        cursor = request.query_params.get('cursor')
+        try:
+            before = tuple(int(part) for part in cursor.split(':')) if cursor else None
+            if before is not None and len(before) != 2:
+                raise ValueError(cursor)
+        except ValueError:
+            raise NotFound('Неверный курсор')
+
+        rows = get_feed_store().page(request.user.pk, before, per_page + 1)
+        page = rows[:per_page]
+        next_link = None
+        if len(rows) > per_page:
+            next_link = replace_query_param(
+                request.build_absolute_uri(), 'cursor', f'{page[-1][1]}:{page[-1][0]}',
+            )
+        # Удаленные и перенесенные в архив статьи просто выпадают из страницы
+        articles = get_articles_by_ids([article_id for article_id, _ in page])
+        return Response({
+            'next': next_link,
+            'per_page': per_page,
+            'articles': [serialize_article(article) for article in articles],
+        })
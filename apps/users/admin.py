@@ -1,5 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
+from core.paginator import EstimatedCountPaginator
 from .models import CustomUser
 from .forms import CustomUserCreationForm, CustomUserChangeForm
 
@@ -22,5 +23,7 @@ class CustomUserAdmin(UserAdmin):
     )
     search_fields = ('email',)
     ordering = ('email',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 admin.site.register(CustomUser, CustomUserAdmin)
\ No newline at end of file
@@ -0,0 +1,64 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+def user_cache_key(user_id) -> str:
+    return f'auth:user:{user_id}'
+
+
+def invalidate_cached_user(user_id):
+    cache.delete(user_cache_key(user_id))
+
+
+def _cached_fields(user):
+    """Поля пользователя для кеша: без хеша пароля, только md5 от него для проверки отзыва токена"""
+    values = {
+        field.attname: getattr(user, field.attname)
+        for field in user._meta.concrete_fields if field.attname != 'password'
+    }
+    return {'fields': values, 'revoke': get_md5_hash_password(user.password)}
+
+
+def _user_from_cache(entry):
+    """Пользователь из записи кеша; password отложен и читается из БД только при обращении"""
+    User = get_user_model()
+    fields = entry['fields']
+    return User.from_db(router.db_for_read(User), list(fields), list(fields.values()))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT-аутентификация с пользователем из кеша.
+
+    Пользователь по id из токена читается из БД один раз на
+    AUTH_USER_CACHE_TTL секунд, а не на каждый запрос. Сохранение и
+    удаление пользователя сбрасывают запись (apps.users.signals), так что
+    правка профиля, админка и деактивация действуют сразу. Правки через
+    QuerySet.update() сигналов не шлют и видны после истечения TTL.
+    """
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None or not settings.AUTH_USER_CACHE_TTL:
+            return super().get_user(validated_token)
+
+        key = user_cache_key(user_id)
+        entry = cache.get(key)
+        if entry is None:
+            # Неактивные и удаленные отсекаются здесь и в кеш не попадают
+            user = super().get_user(validated_token)
+            cache.set(key, _cached_fields(user), settings.AUTH_USER_CACHE_TTL)
+            return user
+
+        if api_settings.CHECK_REVOKE_TOKEN and (
+            validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != entry['revoke']
+        ):
+            raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
+        return _user_from_cache(entry)
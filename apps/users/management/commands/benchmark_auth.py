@@ -0,0 +1,66 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.users.authentication import CachedJWTAuthentication, invalidate_cached_user
+from apps.users.models import CustomUser
+from apps.users.views import ProfileView
+
+AUTH_CLASSES = {
+    'jwt': JWTAuthentication,
+    'cached': CachedJWTAuthentication,
+}
+
+
+class Command(BaseCommand):
+    help = 'Сравнение запросов к БД и задержки GET /api/users/profile/ с обычной и кешируемой JWT-аутентификацией'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help='Запросов на каждый вариант')
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError('--requests должна быть больше 0')
+
+        # Временный пользователь, все изменения откатываются. Кеш включен и без
+        # Redis (там он по умолчанию выключен), иначе сравнивать нечего
+        with transaction.atomic(), override_settings(AUTH_USER_CACHE_TTL=settings.AUTH_USER_CACHE_TTL or 60):
+            user = CustomUser.objects.create_user('benchmark-auth@example.com', None)
+            token = str(AccessToken.for_user(user))
+            self.stdout.write(f'Запросов на вариант: {options["requests"]}')
+            self.stdout.write(f'{"вариант":<8} {"запросов к БД":>14} {"среднее, мс":>12} {"p95, мс":>9}')
+            for name, auth_class in AUTH_CLASSES.items():
+                invalidate_cached_user(user.pk)
+                stats = self.run(auth_class, token, options['requests'])
+                self.stdout.write(
+                    f'{name:<8} {stats["queries"]:>14.2f} {stats["mean_ms"]:>12.3f} {stats["p95_ms"]:>9.3f}'
+                )
+            invalidate_cached_user(user.pk)
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def run(auth_class, token, requests):
+        view = type('BenchmarkProfileView', (ProfileView,), {'authentication_classes': [auth_class]}).as_view()
+        factory = APIRequestFactory()
+        timings = []
+        with CaptureQueriesContext(connection) as queries:
+            for _ in range(requests):
+                request = factory.get('/api/users/profile/', HTTP_AUTHORIZATION=f'Bearer {token}')
+                started = time.perf_counter()
+                response = view(request)
+                timings.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    raise CommandError(f'{auth_class.__name__}: ответ {response.status_code}')
+        timings.sort()
+        return {
+            'queries': len(queries) / requests,
+            'mean_ms': statistics.mean(timings) * 1000,
+            'p95_ms': timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1000,
+        }
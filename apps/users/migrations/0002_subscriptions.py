@@ -0,0 +1,24 @@
+# Generated by Django 5.2.1 on 2026-10-18 14:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0012_archived_article'),
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='subscribed_categories',
+            field=models.ManyToManyField(blank=True, related_name='subscribers', to='news.category', verbose_name='Подписки на категории'),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='subscribed_sources',
+            field=models.ManyToManyField(blank=True, related_name='subscribers', to='news.source', verbose_name='Подписки на источники'),
+        ),
+    ]
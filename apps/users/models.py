@@ -24,6 +24,13 @@ class CustomUser(AbstractUser):
 
     username = None  # Удаляем username
     email = models.EmailField(_('email address'), unique=True)  # Делаем email уникальным
+    # Подписки для персональной ленты (/api/news/feed/)
+    subscribed_sources = models.ManyToManyField(
+        'news.Source', blank=True, related_name='subscribers', verbose_name=_('Подписки на источники'),
+    )
+    subscribed_categories = models.ManyToManyField(
+        'news.Category', blank=True, related_name='subscribers', verbose_name=_('Подписки на категории'),
+    )
 
     USERNAME_FIELD = 'email'  # Используем email для входа
     REQUIRED_FIELDS = []  # Дополнительные поля при createsuperuser
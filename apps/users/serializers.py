@@ -29,4 +29,11 @@ class UserSerializer(serializers.ModelSerializer):
 class LoginSerializer(serializers.Serializer):
     """Сериализатор для входа"""
     email = serializers.EmailField(required=True)
-    password = serializers.CharField(write_only=True, required=True)
\ No newline at end of file
+    password = serializers.CharField(write_only=True, required=True)
+
+class SubscriptionSerializer(serializers.ModelSerializer):
+    """Подписки пользователя на источники и категории (id)"""
+
+    class Meta:
+        model = CustomUser
+        fields = ['subscribed_sources', 'subscribed_categories']
@@ -1,3 +1,101 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.throttling import LocalSlidingWindow, get_sliding_window, parse_rate
+from .authentication import user_cache_key
+from .models import CustomUser
+
+THROTTLE_RATES = {'login_ip': '100/min', 'login_email': '3/min', 'register_ip': '2/hour'}
+
+
+@override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': THROTTLE_RATES})
+class AuthThrottleTest(TestCase):
+    """Лишние попытки входа и регистрации отклоняются до хеширования пароля"""
+
+    def setUp(self):
+        get_sliding_window().clear()
+        self.client = APIClient()
+
+    def test_login_is_limited_per_email_before_authenticate(self):
+        url = reverse('login')
+        with mock.patch('apps.users.views.authenticate', return_value=None) as authenticate:
+            for _ in range(3):
+                response = self.client.post(url, {'email': 'Victim@example.com', 'password': 'wrong'}, format='json')
+                self.assertEqual(response.status_code, 401)
+            response = self.client.post(url, {'email': 'victim@example.com ', 'password': 'wrong'}, format='json')
+            self.assertEqual(response.status_code, 429)
+            self.assertGreater(int(response['Retry-After']), 0)
+            self.assertEqual(authenticate.call_count, 3)
+
+            # Другой аккаунт с того же IP не заблокирован
+            response = self.client.post(url, {'email': 'other@example.com', 'password': 'wrong'}, format='json')
+            self.assertEqual(response.status_code, 401)
+
+    def test_register_is_limited_per_ip(self):
+        url = reverse('register')
+        for i in range(2):
+            self.client.post(url, {'email': f'user{i}@example.com'}, format='json')
+        response = self.client.post(url, {'email': 'user9@example.com'}, format='json')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+
+
+class SlidingWindowTest(TestCase):
+    def test_parse_rate_accepts_drf_periods(self):
+        self.assertEqual(parse_rate('5/min'), (5, 60))
+        self.assertEqual(parse_rate('10/minutes'), (10, 60))
+        self.assertEqual(parse_rate('2/hours'), (2, 3600))
+        self.assertEqual(parse_rate('1/days'), (1, 86400))
+        self.assertEqual(parse_rate('3/s'), (3, 1))
+
+    def test_sweep_keeps_keys_with_long_window(self):
+        window = LocalSlidingWindow()
+        window.max_keys = 1
+        with mock.patch('core.throttling.time.monotonic', return_value=1000):
+            window.hit('hourly', 1, 3600)
+            window.hit('per-second', 1, 1)
+        with mock.patch('core.throttling.time.monotonic', return_value=1010):
+            # Переполнение запускает очистку: секундный ключ устарел, часовой - нет
+            window.hit('other', 1, 1)
+            self.assertNotIn('per-second', window.hits)
+            self.assertGreater(window.hit('hourly', 1, 3600), 0)
+
+
+@override_settings(AUTH_USER_CACHE_TTL=60)
+class CachedAuthenticationTest(TestCase):
+    """Пользователь JWT-запросов из кеша: без хеша пароля, сброс при деактивации и удалении"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user('cached@example.com', 'password')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+
+    def get_profile(self):
+        return self.client.get(reverse('profile'))
+
+    def test_cached_user_has_no_password_hash(self):
+        self.assertEqual(self.get_profile().status_code, 200)
+        entry = cache.get(user_cache_key(self.user.pk))
+        self.assertNotIn('password', entry['fields'])
+        self.assertNotIn(self.user.password, repr(entry))
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_profile().status_code, 200)
+
+    def test_deactivated_user_is_rejected(self):
+        self.assertEqual(self.get_profile().status_code, 200)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.get_profile().status_code, 401)
+
+    def test_deleted_user_is_rejected(self):
+        self.assertEqual(self.get_profile().status_code, 200)
+        self.user.delete()
+        self.assertEqual(self.get_profile().status_code, 401)
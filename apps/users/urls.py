@@ -1,8 +1,9 @@
 from django.urls import path
-from .views import RegisterView, LoginView, ProfileView
+from .views import RegisterView, LoginView, ProfileView, SubscriptionsView
 
 urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
     path('login/', LoginView.as_view(), name='login'),
     path('profile/', ProfileView.as_view(), name='profile'),
+    path('subscriptions/', SubscriptionsView.as_view(), name='subscriptions'),
 ]
\ No newline at end of file
@@ -4,11 +4,15 @@ from rest_framework import status
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate
-from .serializers import UserSerializer, LoginSerializer
+from django.db import transaction
+from core.throttling import EmailThrottle, IPThrottle
+from .serializers import UserSerializer, LoginSerializer, SubscriptionSerializer
 
 class RegisterView(APIView):
     """Регистрация нового пользователя"""
     permission_classes = [AllowAny]
+    throttle_classes = [IPThrottle, EmailThrottle]
+    throttle_scope = 'register'
 
     def post(self, request):
         serializer = UserSerializer(data=request.data)
@@ -25,6 +29,8 @@ class RegisterView(APIView):
 class LoginView(APIView):
     """Аутентификация пользователя"""
     permission_classes = [AllowAny]
+    throttle_classes = [IPThrottle, EmailThrottle]
+    throttle_scope = 'login'
 
     def post(self, request):
         serializer = LoginSerializer(data=request.data)
@@ -61,4 +67,20 @@ class ProfileView(APIView):
         if serializer.is_valid():
             serializer.save()
             return Response(serializer.data)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+class SubscriptionsView(APIView):
+    """Подписки для персональной ленты /api/news/feed/"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response(SubscriptionSerializer(request.user).data)
+
+    def put(self, request):
+        serializer = SubscriptionSerializer(request.user, data=request.data)
+        if serializer.is_valid():
+            # Одна транзакция - одна пересборка ленты на обе смены подписок
+            with transaction.atomic():
+                serializer.save()
+            return Response(serializer.data)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -1,8 +1,32 @@
-
 import os
 
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# После настройки Django: модуль потока импортирует модели
+from apps.news.parsers import close_shared_parsers  # noqa: E402
+from apps.news.stream import STREAM_PATH, news_stream  # noqa: E402
+
+
+async def lifespan(receive, send):
+    """Протокол lifespan: при остановке сервера закрываются сессии общих парсеров"""
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await close_shared_parsers()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def application(scope, receive, send):
+    """SSE-поток новостей - отдельным легким приложением, остальное - Django"""
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+    if scope['type'] == 'http' and scope['path'] == STREAM_PATH:
+        return await news_stream(scope, receive, send)
+    return await django_application(scope, receive, send)
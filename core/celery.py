@@ -1,5 +1,6 @@
 import os
 from celery import Celery
+from celery.signals import task_prerun
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 app = Celery('core')
 app.config_from_object('django.conf:settings', namespace='CELERY')
@@ -11,4 +12,10 @@ def debug_task(self):
 
 app.conf.broker_url = 'redis://localhost:6379/0'
 app.conf.result_backend = 'redis://localhost:6379/0'
-app.conf.timezone = 'Asia/Bishkek'
\ No newline at end of file
+app.conf.timezone = 'Asia/Bishkek'
+
+@task_prerun.connect
+def reset_db_router_state(**kwargs):
+    # Воркер выполняет задачи в одном потоке: чтения с реплики для каждой задачи заново
+    from core.db_router import reset_state
+    reset_state()
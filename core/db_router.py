@@ -0,0 +1,121 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+PRIMARY = 'default'
+REPLICA = 'replica'
+PIN_COOKIE = 'db_pin'
+
+# Состояние запроса (изменяемый dict, чтобы запись из sync_to_async-потока
+# была видна в async-части того же запроса). Вне запросов - общий на поток,
+# поэтому задачи Celery и проходы планировщика начинают с reset_state()
+_state = ContextVar('db_router_state', default=None)
+
+
+def _current_state() -> dict:
+    state = _state.get()
+    if state is None:
+        state = {'pinned': False, 'wrote': False}
+        _state.set(state)
+    return state
+
+
+def reset_state():
+    """Чистое состояние для новой единицы работы вне запроса: запись прошлой не закрепляет чтения"""
+    _state.set({'pinned': False, 'wrote': False})
+
+
+def pin_primary():
+    """Дальнейшие чтения в этом запросе - из основной БД"""
+    _current_state()['pinned'] = True
+
+
+@contextmanager
+def use_primary():
+    """Чтения внутри блока - из основной БД"""
+    token = _state.set({'pinned': True, 'wrote': False})
+    try:
+        yield
+    finally:
+        _state.reset(token)
+
+
+def replica_enabled() -> bool:
+    return REPLICA in settings.DATABASES
+
+
+class PrimaryReplicaRouter:
+    """
+    Чтения моделей из DATABASE_REPLICA_APPS - с реплики, все записи - в основную БД.
+
+    После записи (и в открытой транзакции) чтения этого запроса идут в
+    основную БД, чтобы запрос видел свои изменения, пока реплика отстает.
+    """
+
+    def db_for_read(self, model, **hints):
+        if not replica_enabled() or model._meta.app_label not in settings.DATABASE_REPLICA_APPS:
+            return PRIMARY
+        if _current_state()['pinned'] or connections[PRIMARY].in_atomic_block:
+            return PRIMARY
+        return REPLICA
+
+    def db_for_write(self, model, **hints):
+        state = _current_state()
+        state['pinned'] = state['wrote'] = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Обе базы содержат одни и те же данные
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Реплика получает схему репликацией
+        return db == PRIMARY
+
+
+class ReadYourWritesMiddleware:
+    """
+    Состояние роутера на каждый запрос.
+
+    После записи ставит короткоживущую cookie: следующие запросы
+    клиента (например, GET после POST) тоже читают из основной БД, пока
+    реплика не догонит.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = self._start(request)
+        try:
+            return self._finish(self.get_response(request))
+        finally:
+            _state.reset(token)
+
+    async def __acall__(self, request):
+        token = self._start(request)
+        try:
+            return self._finish(await self.get_response(request))
+        finally:
+            _state.reset(token)
+
+    @staticmethod
+    def _start(request):
+        return _state.set({'pinned': PIN_COOKIE in request.COOKIES, 'wrote': False})
+
+    @staticmethod
+    def _finish(response):
+        if _state.get()['wrote'] and replica_enabled():
+            response.set_cookie(
+                PIN_COOKIE, '1', max_age=settings.DATABASE_REPLICA_PIN_SECONDS, httponly=True, samesite='Lax',
+            )
+        return response
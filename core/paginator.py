@@ -0,0 +1,39 @@
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Пагинатор для больших таблиц в админке.
+
+    Без фильтров на PostgreSQL число строк берется из статистики
+    планировщика (pg_class.reltuples) вместо COUNT(*) по всей таблице.
+    В остальных случаях строки считаются только до exact_limit: дальше
+    страниц все равно не листают.
+    """
+
+    exact_limit = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = self._estimate(queryset)
+            if estimate > self.exact_limit:
+                return estimate
+        return queryset.order_by()[:self.exact_limit + 1].count()
+
+    @staticmethod
+    def _estimate(queryset) -> int:
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        # -1: таблицу еще ни разу не анализировали
+        return max(row[0], 0) if row else 0
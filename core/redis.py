@@ -0,0 +1,36 @@
+import uuid
+from functools import lru_cache
+from typing import Optional
+
+from django.conf import settings
+
+# Снятие блокировки только владельцем: сравнение токена и удаление атомарны
+_RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+@lru_cache(maxsize=None)
+def get_redis() -> Optional['redis.Redis']:
+    """Общий клиент Redis (пул соединений на процесс) или None, если REDIS_URL не задан"""
+    if not settings.REDIS_URL:
+        return None
+    import redis
+
+    return redis.Redis.from_url(settings.REDIS_URL, socket_timeout=1, socket_connect_timeout=1)
+
+
+def acquire_lock(client, key: str, timeout: float) -> Optional[str]:
+    """Блокировка SET NX PX на timeout секунд: токен владельца или None, если она занята"""
+    token = uuid.uuid4().hex
+    if client.set(key, token, nx=True, px=int(timeout * 1000)):
+        return token
+    return None
+
+
+def release_lock(client, key: str, token: str) -> bool:
+    """Снятие блокировки, если она все еще наша (не истекла и не перехвачена)"""
+    return bool(client.register_script(_RELEASE_LOCK_SCRIPT)(keys=[key], args=[token]))
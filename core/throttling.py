@@ -0,0 +1,161 @@
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+from django.conf import settings
+from rest_framework.throttling import BaseThrottle
+
+from core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Скользящее окно в sorted set: score - время запроса, мс. Все шаги в одном
+# скрипте, поэтому счетчик атомарен для всех воркеров; время - часы Redis
+_SLIDING_WINDOW_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) * 1000 + math.floor(tonumber(now_parts[2]) / 1000)
+local window = tonumber(ARGV[1])
+local limit = tonumber(ARGV[2])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], 0, now - window)
+if redis.call('ZCARD', KEYS[1]) < limit then
+    redis.call('ZADD', KEYS[1], now, ARGV[3])
+    redis.call('PEXPIRE', KEYS[1], window)
+    return 0
+end
+local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+return tonumber(oldest[2]) + window - now
+"""
+
+
+def parse_rate(rate: str) -> Tuple[int, int]:
+    """'5/min' -> (5, 60): сколько запросов за сколько секунд; период по первой букве, как в DRF"""
+    count, period = rate.split('/')
+    return int(count), {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}[period[0]]
+
+
+class RedisSlidingWindow:
+    def __init__(self, client):
+        self.script = client.register_script(_SLIDING_WINDOW_SCRIPT)
+
+    def hit(self, key: str, limit: int, window: int) -> float:
+        """0, если запрос пропущен, иначе через сколько секунд освободится место"""
+        wait_ms = self.script(keys=[key], args=[window * 1000, limit, uuid.uuid4().hex])
+        return int(wait_ms) / 1000
+
+
+class LocalSlidingWindow:
+    """Замена Redis для одного процесса (разработка, тесты): лимит на процесс, а не на кластер"""
+    max_keys = 10000
+
+    def __init__(self):
+        # ключ -> (окно, времена запросов): окна у лимитов разные
+        self.hits: Dict[str, Tuple[int, deque]] = {}
+        self.lock = threading.Lock()
+
+    def hit(self, key: str, limit: int, window: int) -> float:
+        now = time.monotonic()
+        with self.lock:
+            if len(self.hits) > self.max_keys:
+                self._sweep(now)
+            hits = self.hits.setdefault(key, (window, deque()))[1]
+            while hits and hits[0] <= now - window:
+                hits.popleft()
+            if len(hits) < limit:
+                hits.append(now)
+                return 0
+            return hits[0] + window - now
+
+    def _sweep(self, now: float):
+        for key in [k for k, (window, hits) in self.hits.items() if not hits or hits[-1] <= now - window]:
+            del self.hits[key]
+
+    def clear(self):
+        with self.lock:
+            self.hits.clear()
+
+
+_local_window = LocalSlidingWindow()
+
+
+@lru_cache(maxsize=None)
+def get_sliding_window():
+    client = get_redis()
+    return RedisSlidingWindow(client) if client is not None else _local_window
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """
+    Троттлинг по скользящему окну, общий для всех воркеров через Redis.
+
+    Лимит берется из DEFAULT_THROTTLE_RATES по ключу
+    '<throttle_scope представления>_<suffix>'; нет такого ключа - нет лимита.
+    Проверка идет в APIView.initial, до обработчика, поэтому отказ не
+    стоит ни хеширования пароля, ни похода на сайт. DRF ставит Retry-After
+    по wait().
+    """
+    suffix = ''
+
+    def get_ident_value(self, request, view) -> Optional[str]:
+        raise NotImplementedError
+
+    def get_rate(self, view) -> Optional[str]:
+        scope = getattr(view, 'throttle_scope', None)
+        if not scope:
+            return None
+        key = f'{scope}_{self.suffix}' if self.suffix else scope
+        return settings.REST_FRAMEWORK.get('DEFAULT_THROTTLE_RATES', {}).get(key)
+
+    def allow_request(self, request, view):
+        self.retry_after = None
+        rate = self.get_rate(view)
+        ident = self.get_ident_value(request, view) if rate else None
+        if not ident:
+            return True
+
+        limit, window = parse_rate(rate)
+        key = f'throttle:{view.throttle_scope}:{self.suffix}:{ident}'
+        try:
+            wait = get_sliding_window().hit(key, limit, window)
+        except Exception as e:
+            # Недоступный Redis не должен класть вход и ленту
+            logger.warning('Троттлинг пропущен, Redis недоступен: %s', e)
+            return True
+        if wait > 0:
+            self.retry_after = wait
+            return False
+        return True
+
+    def wait(self):
+        return self.retry_after
+
+
+class IPThrottle(SlidingWindowThrottle):
+    """Лимит на IP клиента (с учетом NUM_PROXIES для X-Forwarded-For)"""
+    suffix = 'ip'
+
+    def get_ident_value(self, request, view):
+        return self.get_ident(request)
+
+
+class EmailThrottle(SlidingWindowThrottle):
+    """Лимит на email из тела запроса: перебор паролей одного аккаунта с разных IP"""
+    suffix = 'email'
+
+    def get_ident_value(self, request, view):
+        email = request.data.get('email') if hasattr(request.data, 'get') else None
+        if not isinstance(email, str) or not email.strip():
+            return None
+        return email.strip().lower()
+
+
+class UserOrIPThrottle(SlidingWindowThrottle):
+    """Лимит на пользователя, для анонимных - на IP"""
+
+    def get_ident_value(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return f'user:{request.user.pk}'
+        return f'ip:{self.get_ident(request)}'